@@ -1,24 +1,84 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import date, datetime
-from typing import List, Dict, Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Optional, Tuple
 import os
-import json
-import google.generativeai as genai
+import asyncio
 from dotenv import load_dotenv
 from pydantic import BaseModel
 import time
 import atexit
+import orjson
+
+try:
+    # Brotli is optional; without it we still negotiate gzip
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 from models import init_db, DIET_REQUIREMENTS_COLLECTION, DIET_ENTRIES_COLLECTION
-from models import get_diet_entries_by_date, get_diet_requirements
+from models import get_diet_entries_by_date, get_diet_entries_for_dates, get_diet_requirements
+from models import get_daily_category_totals
+from models import delete_entries_with_tombstones, get_entry_changes, parse_change_cursor
+from models import insert_recommendation_telemetry, get_recommendation_telemetry
+import models
 from diet_data_processor import DietDataProcessor
+from entry_events import entry_events
+from diet_summary import build_daily_summary, build_period_completion, get_time_based_completion_target
+from recommendation_cache import create_recommendation_cache, get_meal_time, make_cache_key
+from llm_client import LLMUnavailableError, get_llm_client
+from recommendation_scheduler import PREGENERATE_ENABLED, create_recommendation_scheduler
+from meal_planner import MEALS_LEFT, MealPlanner, format_plan_text
+from single_flight import SingleFlight
+from prompt_builder import PromptBuilder
+from recommendation_telemetry import RecommendationTelemetry, summarize_telemetry
 
 # Load environment variables
 load_dotenv()
 
+class FastJSONResponse(ORJSONResponse):
+    """JSON response rendered with orjson (handles datetimes and numpy values natively)"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip compression that leaves event streams untouched"""
+
+    def __init__(self, app, minimum_size: int):
+        self.app = app
+        if BrotliMiddleware is not None:
+            self.compressor = BrotliMiddleware(app, minimum_size=minimum_size, gzip_fallback=True)
+        else:
+            self.compressor = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope, receive, send):
+        # Compressors buffer output, which would hold back Server-Sent Events
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+        else:
+            await self.compressor(scope, receive, send)
+
+# Only compress payloads above this size (bytes); small responses aren't worth the CPU
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Seconds between keep-alive comments on idle event streams
+STREAM_HEARTBEAT_SECONDS = 15
+
+# Daily summaries are recomputed after writes; the TTL only guards against
+# writes this process can't see (e.g. other processes without change streams)
+SUMMARY_CACHE_TTL = 300
+summary_cache: Dict[str, Dict] = {}
+# Bumped on every write to a day; a summary is only cached if no write landed while it was computed
+summary_generations: Dict[str, int] = {}
+
 # Initialize database backup manager
-app = FastAPI(title="Diet Tracking API")
+app = FastAPI(title="Diet Tracking API", default_response_class=FastJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -29,16 +89,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiate brotli/gzip based on Accept-Encoding
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 # Initialize database and processor
 db = init_db()
 diet_processor = DietDataProcessor()
 food_categories = diet_processor.process_all_pdfs()
+recommendation_cache = create_recommendation_cache()
+meal_planner = MealPlanner(food_categories)
+# Concurrent identical range/summary/recommendation requests share one computation
+single_flight = SingleFlight()
+prompt_builder = PromptBuilder()
+telemetry = RecommendationTelemetry(insert_recommendation_telemetry)
+
+@app.on_event("startup")
+async def start_entry_events():
+    """Start pushing entry change events (change streams when available)"""
+    entry_events.add_listener(lambda event: invalidate_summary(event["date"]))
+    entry_events.start(models.async_db)
+
+@app.on_event("startup")
+async def start_llm_client():
+    """Create the process-wide LLM client once, rather than per request"""
+    try:
+        get_llm_client()
+    except LLMUnavailableError as e:
+        print(f"LLM client unavailable: {e}")
+
+@app.on_event("startup")
+async def start_recommendation_scheduler():
+    """Pre-generate recommendations before meal boundaries and after writes"""
+    if not PREGENERATE_ENABLED:
+        return
+    entry_events.add_listener(lambda event: recommendation_scheduler.notify_write(event["date"]))
+    recommendation_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await entry_events.stop()
+    await recommendation_scheduler.stop()
 
 # Helper dependency to get database
 async def get_db():
     """Database dependency"""
     return db
 
+def format_sse(event: str, data) -> str:
+    """Format a Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+def invalidate_summary(date_str: str):
+    """Drop a day's cached summary and mark summaries computed before now as stale"""
+    summary_generations[date_str] = summary_generations.get(date_str, 0) + 1
+    summary_cache.pop(date_str, None)
+
+def notify_entries_changed(date_str: str, categories):
+    """Invalidate cached data for a day and notify event stream subscribers"""
+    invalidate_summary(date_str)
+    entry_events.publish_local(date_str, categories)
+
 def normalize_category(category: str) -> str:
     """
     Normalize category names to match requirements
@@ -78,6 +188,13 @@ class BatchDietEntries(BaseModel):
     entries: List[DietEntryCreate]
     date: Optional[str] = None
 
+class DateLookup(BaseModel):
+    """Schema for looking up entries on a set of dates"""
+    dates: List[str]
+
+# Upper bound on dates per lookup request
+MAX_LOOKUP_DATES = 366
+
 # Test endpoints
 @app.get("/test/health")
 def health_check():
@@ -115,7 +232,7 @@ async def database_check(db = Depends(get_db)):
 @app.get("/categories")
 def get_categories():
     """Get all available food categories"""
-    return list(food_categories.keys())
+    return FastJSONResponse(list(food_categories.keys()))
 
 @app.get("/foods/{category}")
 def get_foods_in_category(category: str):
@@ -123,7 +240,8 @@ def get_foods_in_category(category: str):
     df = diet_processor.get_food_choices(category)
     if df.empty:
         raise HTTPException(status_code=404, detail=f"Category {category} not found")
-    return df.to_dict(orient='records')
+    # Return the response directly to skip jsonable_encoder on large catalog payloads
+    return FastJSONResponse(df.to_dict(orient='records'))
 
 # Diet entry endpoints
 @app.post("/entries/")
@@ -170,6 +288,7 @@ async def add_diet_entry(
                 "timestamp": datetime.utcnow()
             })
         
+        notify_entries_changed(today.isoformat(), [normalized_category])
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -231,6 +350,10 @@ async def add_diet_entries_batch(
                     "timestamp": datetime.utcnow()
                 })
         
+        notify_entries_changed(
+            entry_date.isoformat(),
+            [normalize_category(entry.category) for entry in batch.entries]
+        )
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -254,7 +377,8 @@ async def reset_entries(
         start_of_day = datetime.combine(entry_date, datetime.min.time())
         end_of_day = datetime.combine(entry_date, datetime.max.time())
         
-        db[DIET_ENTRIES_COLLECTION].delete_many({
+        # Record tombstones so delta sync clients see the deletes
+        delete_entries_with_tombstones(db, {
             "date": {"$gte": start_of_day, "$lte": end_of_day}
         })
         
@@ -282,17 +406,66 @@ async def reset_entries(
         if entries_to_insert:
             db[DIET_ENTRIES_COLLECTION].insert_many(entries_to_insert)
         
+        notify_entries_changed(entry_date.isoformat(), food_categories)
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/entries/changes")
+async def get_changes(since: Optional[str] = None, limit: int = 1000):
+    """
+    Get entries changed since a cursor timestamp
+    
+    Pass the returned next_cursor as `since` on the following call. Omitting
+    `since` returns every entry, for an initial sync.
+    """
+    try:
+        cursor = parse_change_cursor(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor. Use an ISO-8601 timestamp")
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    
+    try:
+        return FastJSONResponse(get_entry_changes(cursor, limit))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/entries/stream")
+async def stream_entry_changes(request: Request, day: Optional[str] = None):
+    """
+    Server-Sent Events stream of per-day entry changes
+    
+    Each event names the date and categories that changed; clients refetch
+    that day (or pull /entries/changes) instead of polling. Pass `day` to
+    only receive events for a single day.
+    """
+    async def event_source():
+        with entry_events.subscribe() as queue:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if day and event["date"] != day:
+                    continue
+                yield format_sse("entries_changed", event)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/entries/{date_str}")
 async def get_daily_entries(date_str: str):
     """Get all diet entries for a specific date"""
     try:
         entries = get_diet_entries_by_date(date_str)
         
-        return [
+        return FastJSONResponse([
             {
                 "category": entry.get("category", ""),
                 "food_item": entry.get("food_item", ""),
@@ -302,10 +475,42 @@ async def get_daily_entries(date_str: str):
                 "date": entry.get("date").date().isoformat()
             }
             for entry in entries
-        ]
+        ])
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
+@app.post("/entries/lookup")
+async def lookup_entries(lookup: DateLookup):
+    """
+    Get diet entries for a list of arbitrary, non-contiguous dates
+    
+    Resolves all dates with a single query and returns a map keyed by each
+    requested date (empty list for days without entries).
+    """
+    if len(lookup.dates) > MAX_LOOKUP_DATES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LOOKUP_DATES} dates per lookup")
+    try:
+        dates = [datetime.strptime(date_str, "%Y-%m-%d").date() for date_str in lookup.dates]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    result = {day.isoformat(): [] for day in dates}
+    try:
+        for entry in get_diet_entries_for_dates(dates):
+            date_str = entry.get("date").date().isoformat()
+            result[date_str].append({
+                "category": entry.get("category", ""),
+                "food_item": entry.get("food_item", ""),
+                "amount": float(entry.get("amount", 0)),
+                "unit": entry.get("unit", ""),
+                "notes": entry.get("notes", ""),
+                "date": date_str
+            })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return FastJSONResponse(result)
+
 @app.get("/entries/batch/{start_date}/{end_date}")
 async def get_batch_entries(start_date: str, end_date: str, db = Depends(get_db)):
     """Get all diet entries for a date range (inclusive)"""
@@ -317,164 +522,270 @@ async def get_batch_entries(start_date: str, end_date: str, db = Depends(get_db)
         if start > end:
             raise HTTPException(status_code=400, detail="Start date must be before or equal to end date")
             
-        # Query all entries within the date range
-        start_datetime = datetime.combine(start, datetime.min.time())
-        end_datetime = datetime.combine(end, datetime.max.time())
-        
-        entries = list(db[DIET_ENTRIES_COLLECTION].find({
-            "date": {"$gte": start_datetime, "$lte": end_datetime}
-        }))
-        
-        # Group entries by date
-        result = {}
-        for entry in entries:
-            date_str = entry.get("date").date().isoformat()
-            if date_str not in result:
-                result[date_str] = []
-                
-            # Convert ObjectId to string for serialization
-            entry_dict = {
-                "category": entry.get("category", ""),
-                "food_item": entry.get("food_item", ""),
-                "amount": float(entry.get("amount", 0)),
-                "unit": entry.get("unit", ""),
-                "notes": entry.get("notes", ""),
-                "date": date_str
-            }
-            result[date_str].append(entry_dict)
+        result = await single_flight.do(
+            ("range", start.isoformat(), end.isoformat()),
+            lambda: asyncio.to_thread(load_range_entries, db, start, end)
+        )
+        return FastJSONResponse(result)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+def load_range_entries(db, start: date, end: date) -> Dict[str, List[Dict]]:
+    """Query all entries within a date range, grouped by date"""
+    start_datetime = datetime.combine(start, datetime.min.time())
+    end_datetime = datetime.combine(end, datetime.max.time())
+    
+    entries = list(db[DIET_ENTRIES_COLLECTION].find({
+        "date": {"$gte": start_datetime, "$lte": end_datetime}
+    }))
+    
+    # Group entries by date
+    result = {}
+    for entry in entries:
+        date_str = entry.get("date").date().isoformat()
+        if date_str not in result:
+            result[date_str] = []
             
-        return result
+        # Convert ObjectId to string for serialization
+        entry_dict = {
+            "category": entry.get("category", ""),
+            "food_item": entry.get("food_item", ""),
+            "amount": float(entry.get("amount", 0)),
+            "unit": entry.get("unit", ""),
+            "notes": entry.get("notes", ""),
+            "date": date_str
+        }
+        result[date_str].append(entry_dict)
+    
+    return result
+
+def compute_daily_summary(date_str: str) -> Dict:
+    """Load a day's entries and requirements and build its summary"""
+    entries = [
+        {"category": normalize_category(entry.get("category", "")), "amount": entry.get("amount", 0)}
+        for entry in get_diet_entries_by_date(date_str)
+    ]
+    return build_daily_summary(entries, get_diet_requirements())
+
+# Upper bound on days per completion request (a few years of history)
+MAX_COMPLETION_DAYS = 3 * 366
+
+def compute_period_completion(start: date, end: date) -> Dict[str, float]:
+    """Overall completion for every day with entries in an inclusive date range"""
+    by_day: Dict[str, List[Dict]] = {}
+    for row in sorted(get_daily_category_totals(start, end), key=lambda row: row["date"]):
+        by_day.setdefault(row["date"].isoformat(), []).append(
+            {"category": normalize_category(row["category"]), "amount": row["amount"]}
+        )
+    return build_period_completion(by_day, get_diet_requirements())
+
+@app.get("/summary/completion/{start_date}/{end_date}")
+async def get_period_completion(start_date: str, end_date: str):
+    """
+    Get the overall completion of every day in a date range (inclusive)
+    
+    Aggregated server-side in one query, for heatmaps and long-range views.
+    Days without entries are omitted (0% completion).
+    """
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    if start > end:
+        raise HTTPException(status_code=400, detail="Start date must be before or equal to end date")
+    if (end - start).days + 1 > MAX_COMPLETION_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COMPLETION_DAYS} days per request")
+    
+    try:
+        days = await single_flight.do(
+            ("completion", start.isoformat(), end.isoformat()),
+            lambda: asyncio.to_thread(compute_period_completion, start, end)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return FastJSONResponse({"start": start.isoformat(), "end": end.isoformat(), "days": days})
+
+@app.get("/summary/{date_str}")
+async def get_daily_summary(date_str: str):
+    """
+    Get computed progress for a day
+    
+    Returns consumed, required, remaining and percentage per category, the
+    weighted overall completion and the current time-of-day pacing target.
+    """
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    cached = summary_cache.get(date_str)
+    if cached is None or time.time() - cached["cached_at"] > SUMMARY_CACHE_TTL:
+        generation = summary_generations.get(date_str, 0)
+        # Keyed by generation so a write starts a fresh flight instead of joining a stale one
+        summary = await single_flight.do(
+            ("summary", date_str, generation),
+            lambda: asyncio.to_thread(compute_daily_summary, date_str)
+        )
+        cached = {"summary": summary, "cached_at": time.time()}
+        # A write during the compute may not be reflected; serve it but don't cache it
+        if summary_generations.get(date_str, 0) == generation:
+            summary_cache[date_str] = cached
+    
+    return FastJSONResponse({
+        "date": date_str,
+        **cached["summary"],
+        # The pacing target moves with the clock, so it's never cached
+        "target_completion": get_time_based_completion_target()
+    })
 
 # AI recommendations endpoint
-async def get_ai_recommendation(food_history: List[Dict], requirements: List[Dict]) -> str:
+def calculate_remaining(food_history: List[Dict], requirements: List[Dict]) -> Dict[str, Dict]:
     """
-    Get AI-powered diet recommendations using Google's Gemini API
+    Calculate remaining amounts for categories that are not yet complete
     
     Args:
-        food_history: List of recent food entries
+        food_history: Diet entries for the day
         requirements: List of dietary requirements
         
     Returns:
-        String containing AI-generated recommendations
+        Dict mapping category to {"amount": remaining, "unit": unit}
     """
-    try:
-        # Configure the Gemini API
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            return "Error: Gemini API key not found in environment variables"
-        
-        genai.configure(api_key=api_key)
-        
-        # Initialize the model
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Calculate remaining exchanges
-        consumed = {entry["category"]: entry["amount"] for entry in food_history}
-        remaining = {}
-        for req in requirements:
-            category = req["category"]
-            required = req["amount"]
-            consumed_amount = consumed.get(category, 0)
-            if consumed_amount < required:
-                remaining[category] = {
-                    "amount": required - consumed_amount,
-                    "unit": req["unit"]
-                }
-        
-        # Get available food items from PDFs for remaining categories
-        available_foods = {}
-        for category in remaining.keys():
-            foods = diet_processor.get_food_choices(category)
-            if not foods.empty:
-                available_foods[category] = foods.to_dict(orient='records')
-          # Get current time for context
-        current_hour = datetime.now().hour
-        meal_time = "breakfast" if current_hour < 11 else "lunch" if current_hour < 16 else "dinner" if current_hour < 22 else "snack"
-        
-        # Format remaining items more clearly
-        remaining_details = "\n".join([
-            f"- {category}: {details['amount']} {details['unit']} remaining"
-            for category, details in remaining.items()
-        ])
-        
-        # Format available foods more clearly
-        available_combinations = {}
-        for category, foods in available_foods.items():
-            if foods:
-                available_combinations[category] = [
-                    f"{food.get('food_item', 'Unknown')} ({food.get('portion_size', 'portion size not specified')})"
-                    for food in foods[:5]  # Limit to 5 examples per category
-                ]
-        
-        # Construct the prompt with more specific guidance
-        prompt = f"""As a specialized pediatric nutritionist, provide detailed recommendations for {meal_time} based on:
-
-CURRENT SITUATION:
-- Meal time: {meal_time}
-- Remaining daily requirements:
-{remaining_details}
-
-AVAILABLE FOOD OPTIONS PER CATEGORY:
-{json.dumps(available_combinations, indent=2)}
-
-Please provide a structured response with:
-
-1. IMMEDIATE RECOMMENDATIONS:
-   - Suggest specific food combinations from the available options that work well for {meal_time}
-   - Show exact exchange values and portion sizes
-   - Focus on meeting the categories with highest remaining requirements first
-
-2. RECIPE IDEAS (2-3 kid-friendly combinations):
-   - Use only the available ingredients listed above
-   - Combine items from different food categories when possible
-   - Specify exact portions and exchange values
-   - Include simple preparation instructions
-
-3. PLANNING FOR REMAINING DAY:
-   - Suggest how to distribute the remaining exchanges across future meals
-   - Highlight any nutritional gaps that need attention
-
-Requirements:
-- Be very specific with food items, using only those listed
-- Include exact exchange values for each suggestion
-- Keep portions child-appropriate
-- Make combinations appealing and practical for children
-- Consider the time of day ({meal_time}) when making suggestions
-
-Remember this is for a child with special dietary needs and suggestions should be practical to prepare."""        # Generate response
-        response = model.generate_content(prompt)
-        if not response:
-            return "Error: No response received from Gemini API"
-        
-        # Return both prompt and response
-        full_response = f"""
+    consumed = {entry["category"]: entry["amount"] for entry in food_history}
+    remaining = {}
+    for req in requirements:
+        category = req["category"]
+        required = req["amount"]
+        consumed_amount = consumed.get(category, 0)
+        if consumed_amount < required:
+            remaining[category] = {
+                "amount": required - consumed_amount,
+                "unit": req["unit"]
+            }
+    return remaining
+
+def build_recommendation_prompt(remaining: Dict[str, Dict], meal_time: str) -> str:
+    """Build the LLM prompt for the remaining requirements and meal time"""
+    # Food options are precomputed per catalog version; the builder trims them to the token budget
+    options = diet_processor.get_prompt_options(remaining.keys())
+    prompt, _ = prompt_builder.build(remaining, meal_time, options)
+    return prompt
+
+def format_fallback_plan(remaining: Dict[str, Dict], meal_time: str, error: Exception) -> str:
+    """Format a local meal plan used in place of an LLM answer"""
+    plan = meal_planner.plan(remaining, meal_time)
+    return f"""AI recommendations unavailable ({str(error) or type(error).__name__}). Local meal plan:
+
+{format_plan_text(plan)}
+"""
+
+def format_recommendation(prompt: str, text: str) -> str:
+    """Format the prompt and AI response for display"""
+    return f"""
 === PROMPT SENT TO AI ===
 {prompt}
 
 === AI RESPONSE ===
-{response.text}
+{text}
 """
-        return full_response
+
+async def generate_recommendation(remaining: Dict[str, Dict], meal_time: str, source: str = "api") -> Tuple[str, str]:
+    """
+    Get a (prompt, text) recommendation from the cache or the LLM
+    
+    Args:
+        source: Caller recorded in telemetry (api, pregenerate, ...)
+    
+    Raises:
+        LLMUnavailableError: If no LLM provider is configured
+        LLMTimeoutError: If the LLM doesn't answer in time
+    """
+    started = time.perf_counter()
+    # Identical remaining state, meal slot and catalog produce the same prompt
+    cache_key = make_cache_key(remaining, meal_time, diet_processor.catalog_version)
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        telemetry.record(source, meal_time, (time.perf_counter() - started) * 1000, True, prompt=cached[0])
+        return cached
+    
+    # Concurrent misses for the same key share one LLM call
+    return await single_flight.do(
+        ("recommendation",) + cache_key,
+        lambda: _generate_uncached_recommendation(remaining, meal_time, cache_key, source)
+    )
+
+async def _generate_uncached_recommendation(
+    remaining: Dict[str, Dict], meal_time: str, cache_key, source: str
+) -> Tuple[str, str]:
+    """Build the prompt, call the LLM, cache the (prompt, text) result and record telemetry"""
+    started = time.perf_counter()
+    prompt = build_recommendation_prompt(remaining, meal_time)
+    try:
+        llm = get_llm_client()
+        text = await llm.generate(prompt)
+        if not text:
+            raise ValueError("No response received from the LLM")
+    except Exception as e:
+        telemetry.record(source, meal_time, (time.perf_counter() - started) * 1000, False, prompt=prompt, error=e)
+        raise
+    
+    telemetry.record(source, meal_time, (time.perf_counter() - started) * 1000, False, prompt=prompt, response=text)
+    recommendation_cache.set(cache_key, (prompt, text))
+    return prompt, text
+
+async def get_ai_recommendation(food_history: List[Dict], requirements: List[Dict]) -> str:
+    """
+    Get AI-powered diet recommendations from the configured LLM provider
+    
+    Args:
+        food_history: List of recent food entries
+        requirements: List of dietary requirements
+        
+    Returns:
+        String containing AI-generated recommendations
+    """
+    try:
+        remaining = calculate_remaining(food_history, requirements)
+        
+        # Get current time for context
+        meal_time = get_meal_time(datetime.now().hour)
     except Exception as e:
         return f"Error getting AI recommendation: {str(e)}"
+    
+    try:
+        prompt, text = await generate_recommendation(remaining, meal_time)
+        return format_recommendation(prompt, text)
+    except Exception as e:
+        # The LLM is down, slow or not configured: answer with the local planner
+        return format_fallback_plan(remaining, meal_time, e)
+
+def load_recommendation_inputs(db, target_date: Optional[date] = None):
+    """Get the entries for a day (default today) and the requirements"""
+    target_date = target_date or date.today()
+    day_start = datetime.combine(target_date, datetime.min.time())
+    day_end = datetime.combine(target_date, datetime.max.time())
+    
+    entries = list(db[DIET_ENTRIES_COLLECTION].find({
+        "date": {"$gte": day_start, "$lte": day_end}
+    }))
+    requirements = list(db[DIET_REQUIREMENTS_COLLECTION].find())
+    return entries, requirements
+
+async def pregenerate_recommendation(meal_time: str, meal_date: date):
+    """Warm the recommendation cache for a meal slot (used by the scheduler)"""
+    entries, requirements = await asyncio.to_thread(load_recommendation_inputs, db, meal_date)
+    remaining = calculate_remaining(entries, requirements)
+    cache_key = make_cache_key(remaining, meal_time, diet_processor.catalog_version)
+    if remaining and recommendation_cache.peek(cache_key) is None:
+        await generate_recommendation(remaining, meal_time, source="pregenerate")
+
+recommendation_scheduler = create_recommendation_scheduler(pregenerate_recommendation)
 
 @app.get("/recommendations")
 async def get_recommendations(db = Depends(get_db)):
     """Get AI-powered recommendations based on recent diet history"""
     try:
-        # Get today's entries
-        today = date.today()
-        today_start = datetime.combine(today, datetime.min.time())
-        today_end = datetime.combine(today, datetime.max.time())
-        
-        entries = list(db[DIET_ENTRIES_COLLECTION].find({
-            "date": {"$gte": today_start, "$lte": today_end}
-        }))
-        
-        # Get requirements
-        requirements = list(db[DIET_REQUIREMENTS_COLLECTION].find())
+        entries, requirements = load_recommendation_inputs(db)
         
         # Get AI recommendations
         recommendations = await get_ai_recommendation(entries, requirements)
@@ -482,6 +793,124 @@ async def get_recommendations(db = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/recommendations/plan")
+async def get_meal_plan(meal_time: Optional[str] = None, db = Depends(get_db)):
+    """
+    Get a local meal plan for today's remaining requirements
+    
+    Picks concrete catalog items and portions without calling the LLM.
+    `meal_time` defaults to the current meal slot.
+    """
+    if meal_time is not None and meal_time not in MEALS_LEFT:
+        raise HTTPException(status_code=400, detail=f"meal_time must be one of {', '.join(MEALS_LEFT)}")
+    try:
+        entries, requirements = load_recommendation_inputs(db)
+        remaining = calculate_remaining(entries, requirements)
+        plan = meal_planner.plan(remaining, meal_time or get_meal_time(datetime.now().hour))
+        return {**plan, "text": format_plan_text(plan)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/recommendations/stream")
+async def stream_recommendations(request: Request, db = Depends(get_db)):
+    """
+    Stream AI recommendations as Server-Sent Events
+    
+    Emits `chunk` events ({"text": ...}) as the LLM generates them, then a
+    single `done` event, or an `error` event on failure. Cached answers are
+    sent as one chunk.
+    """
+    try:
+        entries, requirements = load_recommendation_inputs(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    remaining = calculate_remaining(entries, requirements)
+    meal_time = get_meal_time(datetime.now().hour)
+    cache_key = make_cache_key(remaining, meal_time, diet_processor.catalog_version)
+    
+    async def event_source():
+        started = time.perf_counter()
+        cached = recommendation_cache.get(cache_key)
+        if cached is not None:
+            telemetry.record("stream", meal_time, (time.perf_counter() - started) * 1000, True, prompt=cached[0])
+            yield format_sse("chunk", {"text": cached[1]})
+            yield format_sse("done", {"cached": True, "meal_time": meal_time})
+            return
+        
+        prompt = build_recommendation_prompt(remaining, meal_time)
+        parts = []
+        try:
+            llm = get_llm_client()
+            async for text in llm.stream(prompt):
+                if await request.is_disconnected():
+                    return
+                parts.append(text)
+                yield format_sse("chunk", {"text": text})
+        except Exception as e:
+            telemetry.record("stream", meal_time, (time.perf_counter() - started) * 1000, False, prompt=prompt, error=e)
+            if parts:
+                yield format_sse("error", {"detail": f"Error getting AI recommendation: {str(e)}"})
+            else:
+                # Nothing streamed yet, so the local plan can stand in for the answer
+                yield format_sse("chunk", {"text": format_fallback_plan(remaining, meal_time, e)})
+                yield format_sse("done", {"cached": False, "fallback": True, "meal_time": meal_time})
+            return
+        
+        response = "".join(parts)
+        telemetry.record("stream", meal_time, (time.perf_counter() - started) * 1000, False, prompt=prompt, response=response)
+        recommendation_cache.set(cache_key, (prompt, response))
+        yield format_sse("done", {"cached": False, "meal_time": meal_time})
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/metrics/recommendations")
+async def get_recommendation_metrics(window_minutes: Optional[int] = None, limit: int = 5000):
+    """
+    Get latency, token and error percentiles for recommendation requests
+    
+    Summarizes the most recent `limit` telemetry records, optionally only
+    those from the last `window_minutes`.
+    """
+    if limit < 1 or (window_minutes is not None and window_minutes < 1):
+        raise HTTPException(status_code=400, detail="limit and window_minutes must be positive")
+    since = datetime.utcnow() - timedelta(minutes=window_minutes) if window_minutes else None
+    try:
+        records = await asyncio.to_thread(get_recommendation_telemetry, since, min(limit, 50000))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "window_minutes": window_minutes,
+        **summarize_telemetry(records),
+        "telemetry_write_failures": telemetry.write_failures
+    }
+
+@app.get("/metrics/single-flight")
+def get_single_flight_stats():
+    """Get how many range, summary and recommendation calls were coalesced"""
+    return {
+        "in_flight": single_flight.in_flight,
+        "by_kind": single_flight.stats()
+    }
+
+@app.get("/metrics/recommendation-cache")
+def get_recommendation_cache_stats():
+    """Get hit/miss statistics for the recommendation cache, pre-generation runs and LLM token usage"""
+    try:
+        llm_usage = get_llm_client().usage_stats()
+    except LLMUnavailableError:
+        llm_usage = None
+    return {
+        **recommendation_cache.stats(),
+        "pregeneration": recommendation_scheduler.stats(),
+        "prompt_token_budget": prompt_builder.token_budget,
+        "llm_usage": llm_usage
+    }
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", "8000"))
@@ -2,14 +2,17 @@ import os
 import streamlit as st
 import pandas as pd
 import requests
-from datetime import datetime, date, time
-import plotly.express as px
+from datetime import datetime, date, time, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from modules import history  # Import the history module
-import json
+from modules.api_client import get_api_client
+from modules.charts import show_bar_chart
+from modules.write_queue import WriteQueue
 import time as timelib
 
 # API endpoint - use environment variable with fallback
 API_URL = os.getenv('API_URL', 'http://localhost:8000')
+api = get_api_client(API_URL)
 
 st.set_page_config(page_title="Diet Tracker", layout="wide")
 
@@ -24,6 +27,32 @@ if 'change_threshold' not in st.session_state:
     st.session_state.change_threshold = 3  # Auto-save after this many changes
 if 'reset_sliders' not in st.session_state:
     st.session_state.reset_sliders = False
+if 'last_saved_values' not in st.session_state:
+    st.session_state.last_saved_values = {}  # Snapshot of what the API has, to diff slider values against
+if 'last_change_at' not in st.session_state:
+    st.session_state.last_change_at = 0.0
+if 'last_saved_at' not in st.session_state:
+    st.session_state.last_saved_at = None
+if 'loaded_date' not in st.session_state:
+    st.session_state.loaded_date = None  # Day whose entries last loaded from the API (None if that load failed)
+if 'snapshot_saved_dates' not in st.session_state:
+    st.session_state.snapshot_saved_dates = set()  # Days this session has saved every category for
+
+if 'prefetched' not in st.session_state:
+    st.session_state.prefetched = {}  # date_str -> (Future, started_at)
+
+# Days before/after the selected date fetched in the background
+PREFETCH_DAYS = 3
+# Prefetched days older than this are fetched again
+PREFETCH_TTL = 300
+
+# Saves not yet accepted by the API are kept here and retried in the background
+WRITE_QUEUE_PATH = os.getenv('WRITE_QUEUE_PATH', '.pending_saves.sqlite3')
+
+# Autosave once the sliders have been idle this long (or after change_threshold changes)
+AUTOSAVE_IDLE_SECONDS = 5
+# How often the autosave indicator checks for pending changes
+AUTOSAVE_POLL_SECONDS = 2
 
 # Daily requirements (max values for sliders)
 DAILY_REQUIREMENTS = {
@@ -57,32 +86,114 @@ SLIDER_STYLES = """
 </style>
 """
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_resource
+def get_write_queue():
+    """Local write queue shared across reruns and sessions, with its background sender running"""
+    queue = WriteQueue(
+        WRITE_QUEUE_PATH,
+        # The queue tells transient failures from rejections by the status code
+        sender=lambda day, entries: api.post_entries(entries, day).status_code,
+        on_sent=history.get_month_cache().invalidate_date
+    )
+    queue.start()
+    return queue
+
+write_queue = get_write_queue()
+
+@st.cache_data(ttl=300)  # Cache for 5 minutes (failures raise, so they aren't cached)
 def load_daily_entries(date_str):
     print(f"Loading entries for {date_str}")  # Debug logging
-    response = requests.get(f"{API_URL}/entries/{date_str}")
-    if response.status_code == 200:
-        data = response.json()
-        # Initialize all categories with 0 if they don't exist
-        all_entries = {category: 0.0 for category in DAILY_REQUIREMENTS.keys()}
-        # Update with actual values from database
-        for entry in data:
-            category = normalize_category(entry['category'])
-            all_entries[category] = float(entry['amount'])
-        
-        # Safe dictionary access with default values
-        return [
-            {
-                "category": cat,
-                "amount": amt,
-                "unit": DAILY_REQUIREMENTS.get(cat, {"unit": "exchange"})["unit"]
-            }
-            for cat, amt in all_entries.items()
-        ]
-    return []
+    return fetch_daily_entries(date_str)
+
+def build_day_entries(amounts, date_str):
+    """One entry per category from stored amounts, with saves still waiting in the local queue on top"""
+    # Initialize all categories with 0 if they don't exist
+    all_entries = {category: 0.0 for category in DAILY_REQUIREMENTS.keys()}
+    all_entries.update(amounts)
+    # Queued saves are newer than the API's copy
+    all_entries.update(write_queue.pending(date_str))
+    
+    # Safe dictionary access with default values
+    return [
+        {
+            "category": cat,
+            "amount": amt,
+            "unit": DAILY_REQUIREMENTS.get(cat, {"unit": "exchange"})["unit"]
+        }
+        for cat, amt in all_entries.items()
+    ]
+
+def fetch_daily_entries(date_str):
+    """
+    Fetch a day's entries, one per category (no Streamlit calls, so safe on background threads)
+    
+    Raises:
+        requests.RequestException: If the API can't be reached or answers with an error
+    """
+    response = api.get(f"/entries/{date_str}")
+    response.raise_for_status()
+    # Update with actual values from database
+    amounts = {
+        normalize_category(entry['category']): float(entry['amount'])
+        for entry in response.json()
+    }
+    return build_day_entries(amounts, date_str)
+
+@st.cache_resource
+def get_prefetch_executor():
+    """Thread pool for background date prefetches, shared across reruns and sessions"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+
+def prefetch_adjacent_dates(center_date):
+    """Start background fetches for the days around center_date that aren't already prefetched"""
+    executor = get_prefetch_executor()
+    prefetched = st.session_state.prefetched
+    now = timelib.monotonic()
+    for offset in range(-PREFETCH_DAYS, PREFETCH_DAYS + 1):
+        day = center_date + timedelta(days=offset)
+        # Nothing is logged for future days
+        if offset == 0 or day > date.today():
+            continue
+        day_str = day.strftime("%Y-%m-%d")
+        entry = prefetched.get(day_str)
+        if entry is None or now - entry[1] > PREFETCH_TTL or (entry[0].done() and entry[0].exception()):
+            prefetched[day_str] = (executor.submit(fetch_daily_entries, day_str), now)
+
+def drop_prefetched(date_str):
+    """Forget a prefetched day (after writing to it)"""
+    st.session_state.prefetched.pop(date_str, None)
+
+def get_daily_entries(date_str):
+    """
+    Entries for a day, taken from the background prefetch when one is available
+    
+    Returns:
+        (entries, loaded); if the API can't be read, entries hold only the
+        locally queued saves (zeros elsewhere) and loaded is False
+    """
+    entry = st.session_state.prefetched.get(date_str)
+    if entry is not None and timelib.monotonic() - entry[1] <= PREFETCH_TTL:
+        try:
+            # Already fetched, or in flight and further along than a new request would be
+            return entry[0].result(), True
+        except Exception as e:
+            print(f"Prefetch for {date_str} failed: {e}")
+            drop_prefetched(date_str)
+    try:
+        return load_daily_entries(date_str), True
+    except requests.RequestException as e:
+        print(f"Failed to load entries for {date_str}: {e}")
+        return build_day_entries({}, date_str), False
+
+def load_selected_day(date_str):
+    """Load the day being edited into session state and record whether the API answered"""
+    st.session_state.daily_entries, loaded = get_daily_entries(date_str)
+    st.session_state.loaded_date = date_str if loaded else None
+    st.session_state.last_update = datetime.now()
+    st.session_state.last_saved_values = get_consumed_amounts()
 
 def save_entries(entries, date_str=None):
-    """Save multiple entries in a single request"""
+    """Queue multiple entries to be saved in a single request (returns once they are on disk)"""
     entries_list = []
     
     for category, amount in entries.items():
@@ -101,23 +212,15 @@ def save_entries(entries, date_str=None):
             "notes": "Updated via slider"
         })
     
-    # Include the date in the request if provided
-    request_data = {"entries": entries_list}
-    if date_str:
-        request_data["date"] = date_str
-    
-    response = requests.post(
-        f"{API_URL}/entries/batch",
-        json=request_data
-    )
-    return response.status_code == 200
+    # Sent by the queue's background thread, which also invalidates the month cache once the API has them
+    write_queue.enqueue(date_str or date.today().strftime("%Y-%m-%d"), entries_list)
 
 def update_progress_data(selected_date_str):
     """Update cached daily entries"""
     # Clear the cache before updating
     load_daily_entries.clear()
-    st.session_state.daily_entries = load_daily_entries(selected_date_str)
-    st.session_state.last_update = datetime.now()
+    drop_prefetched(selected_date_str)
+    load_selected_day(selected_date_str)
 
 def get_consumed_amounts():
     """Get current consumed amounts from cached data"""
@@ -128,14 +231,70 @@ def get_consumed_amounts():
             consumed[category] = float(entry['amount'])
     return consumed
 
+def get_slider_values():
+    """Current slider positions, falling back to the saved value for sliders not yet rendered"""
+    saved = st.session_state.last_saved_values
+    return {
+        category: float(st.session_state.get(f"slider_{category}", saved.get(category, 0.0)))
+        for category in DAILY_REQUIREMENTS.keys()
+    }
+
+def get_dirty_values():
+    """Categories whose slider differs from the last saved snapshot"""
+    saved = st.session_state.last_saved_values
+    return {
+        category: value
+        for category, value in get_slider_values().items()
+        if abs(value - saved.get(category, 0.0)) > 1e-9
+    }
+
+def mark_slider_changed():
+    """Slider on_change callback: count the change and restart the idle timer"""
+    st.session_state.pending_changes += 1
+    st.session_state.last_change_at = timelib.monotonic()
+
+def save_dirty_values(date_str):
+    """
+    Save only the categories that changed since the last save
+    
+    The first save of a day sends every category, so the day is stored with a
+    row per category rather than only the ones touched. That only happens if
+    the day loaded from the API; after a failed load the untouched sliders
+    show zeros, not the stored values, so only the changes are sent.
+    
+    Returns:
+        Number of categories queued
+    """
+    dirty = get_dirty_values()
+    if not dirty:
+        return 0
+    full_snapshot = (
+        date_str not in st.session_state.snapshot_saved_dates and
+        st.session_state.loaded_date == date_str
+    )
+    if full_snapshot:
+        dirty = get_slider_values()
+    save_entries(dirty, date_str)
+    drop_prefetched(date_str)
+    if full_snapshot:
+        st.session_state.snapshot_saved_dates.add(date_str)
+    st.session_state.last_saved_values.update(dirty)
+    st.session_state.pending_changes = 0
+    st.session_state.last_saved_at = datetime.now()
+    return len(dirty)
+
 def reset_all_values(selected_date_str=None):
     """Reset all values to 0 in the database and clear session state"""
+    # Queued saves for the day would otherwise be replayed over the reset
+    write_queue.discard(selected_date_str or date.today().strftime("%Y-%m-%d"))
     # Call the reset endpoint
-    response = requests.post(f"{API_URL}/entries/reset", json={"date": selected_date_str})
-    success = response.status_code == 200
+    success = api.reset_entries(selected_date_str)
+    if success:
+        history.invalidate_month_data(selected_date_str or date.today())
     
     if success:
         # Clear session state
+        st.session_state.snapshot_saved_dates.discard(selected_date_str or date.today().strftime("%Y-%m-%d"))
         st.session_state.daily_entries = None
         st.session_state.last_update = None
         # Clear all slider values in session state
@@ -286,8 +445,10 @@ def copy_from_yesterday(target_date_str):
     yesterday_str = yesterday.strftime("%Y-%m-%d")
     
     # Load yesterday's entries
-    yesterday_entries = load_daily_entries(yesterday_str)
+    yesterday_entries, loaded = get_daily_entries(yesterday_str)
     
+    if not loaded:
+        return False, "Couldn't load yesterday's entries"
     if not yesterday_entries:
         return False, "No entries found for yesterday"
     
@@ -297,15 +458,201 @@ def copy_from_yesterday(target_date_str):
         amount = entry["amount"]
         st.session_state[f"slider_{category}"] = float(amount)
     
-    return True, f"Copied entries from {yesterday_str} for editing (not saved yet)"
+    return True, f"Copied entries from {yesterday_str} (will be autosaved)"
+
+def stream_recommendations():
+    """Yield AI recommendation text chunks as the API streams them"""
+    for event, data in api.stream_recommendations():
+        if event == "chunk":
+            yield data["text"]
+        elif event == "error":
+            yield data["detail"]
+
+
+def build_progress_df(entries):
+    """Per-category consumed, required and percentage for a day's saved entries"""
+    df = pd.DataFrame(entries)
+    progress_df = df.groupby("category")["amount"].sum().reset_index()
+    progress_df["required"] = progress_df["category"].map(
+        lambda x: DAILY_REQUIREMENTS.get(x, {"amount": 1.0})["amount"]
+    )
+    progress_df["unit"] = progress_df["category"].map(
+        lambda x: DAILY_REQUIREMENTS.get(x, {"unit": "exchange"})["unit"]
+    )
+    progress_df["percentage"] = (progress_df["amount"] / progress_df["required"] * 100).clip(0, 100)
+    return progress_df
+
+@st.fragment
+def show_completion_metrics():
+    """Completion metrics and suggestions (depend on saved entries, not slider positions)"""
+    if not st.session_state.daily_entries:
+        return
+    progress_df = build_progress_df(st.session_state.daily_entries)
+    if progress_df.empty:
+        return
+    
+    # Calculate overall completion
+    overall_completion = calculate_overall_completion(progress_df)
+    target_completion = get_time_based_completion_target()
+    
+    # Display completion metrics
+    col_metric1, col_metric2, col_metric3 = st.columns(3)
+    with col_metric1:
+        st.metric("Overall Completion", f"{overall_completion:.1f}%")
+    with col_metric2:
+        st.metric("Target for Current Time", f"{target_completion}%")
+    with col_metric3:
+        time_remaining = "Calculating..."  # Placeholder for time remaining
+        st.metric("Time Until Next Reset", time_remaining)
+    
+    # Show smart suggestions
+    st.subheader("Smart Suggestions")
+    suggestions = get_smart_suggestions(overall_completion, target_completion, progress_df)
+    for suggestion in suggestions:
+        st.markdown(suggestion)
+    
+    # Add visual separator
+    st.markdown("---")
 
-def get_recommendations():
-    """Get AI recommendations from the API"""
-    response = requests.get(f"{API_URL}/recommendations")
-    if response.status_code == 200:
-        data = response.json()
-        return data.get("recommendations", "No recommendations available")
-    return "Failed to get recommendations"
+@st.fragment(run_every=AUTOSAVE_POLL_SECONDS)
+def show_autosave_status(selected_date_str):
+    """Saved/pending indicator; autosaves changed categories after change_threshold changes or when idle"""
+    dirty = get_dirty_values()
+    now = timelib.monotonic()
+    due = (
+        st.session_state.pending_changes >= st.session_state.change_threshold or
+        now - st.session_state.last_change_at >= AUTOSAVE_IDLE_SECONDS
+    )
+    if dirty and due:
+        save_dirty_values(selected_date_str)
+        update_progress_data(selected_date_str)
+        # Refresh metrics and chart with the saved values
+        st.rerun()
+    
+    # Saves return once they are queued locally; the queue knows whether the API has them
+    queued = write_queue.stats()
+    if dirty:
+        st.caption(f"✏️ {len(dirty)} unsaved change(s) - autosaving...")
+    elif queued["retrying_days"]:
+        st.caption(
+            f"⚠️ {queued['pending_days']} day(s) saved on this device, API unreachable - retrying"
+            f" ({queued['last_error']})"
+        )
+    elif queued["pending_days"]:
+        st.caption(f"☁️ Syncing {queued['pending_days']} day(s)...")
+    elif st.session_state.last_saved_at:
+        st.caption(f"✅ All changes saved at {st.session_state.last_saved_at.strftime('%H:%M:%S')}")
+    else:
+        st.caption("✅ All changes saved")
+    
+    if queued["rejected_saves"]:
+        st.error(
+            f"❌ The API rejected {queued['rejected_saves']} save(s) for "
+            f"{', '.join(queued['rejected_days'])}; those changes were not stored"
+        )
+        if st.button("Dismiss", key="dismiss_rejected_saves"):
+            write_queue.clear_rejected()
+            st.rerun()
+
+@st.fragment
+def show_slider_panel(selected_date_str):
+    """Action buttons and one slider per category; a slider change reruns only this fragment"""
+    consumed = get_consumed_amounts()
+    
+    # Add Reset, Copy from Yesterday, and Save All Changes buttons at the top
+    col_reset, col_copy, col_save = st.columns(3)
+    with col_reset:
+        if st.button("Reset All Values", type="secondary", use_container_width=True):
+            reset_sliders_locally()  # Only reset sliders locally
+            st.success("All slider values reset to 0")
+            st.rerun()
+    with col_copy:
+        if st.button("Copy from Yesterday", type="primary", use_container_width=True):
+            success, message = copy_from_yesterday(selected_date_str)
+            if success:
+                st.success(message)
+                update_progress_data(selected_date_str)
+                st.rerun()
+            else:
+                st.error(message)
+    with col_save:
+        if st.button("Save All Changes", type="primary", use_container_width=True):
+            count = save_dirty_values(selected_date_str)
+            if count == 0:
+                st.info("No changes to save")
+            else:
+                update_progress_data(selected_date_str)  # Update cache after save
+                # Full rerun so the metrics and chart pick up the saved values
+                st.rerun()
+    
+    st.markdown("---")
+    
+    # Sort categories by completion status
+    sorted_categories = sort_categories_by_completion(consumed)
+    
+    # Create more compact sliders for each sorted category
+    for cat_info in sorted_categories:
+        category = cat_info['category']
+        req = cat_info['requirement']
+        current_value = consumed.get(category, 0)
+        max_value = req["amount"]
+        unit = req["unit"]
+        completion = cat_info['completion']
+        
+        # More compact display with completion indicator
+        col_label, col_slider = st.columns([1, 2])
+        with col_label:
+            status_emoji = "⚠️ " if completion < 100 else "✅ "
+            st.markdown(f"{status_emoji}**{category.title()}** ({unit})<br>{current_value:.1f}/{max_value:.1f}", unsafe_allow_html=True)
+        with col_slider:
+            # Use session state value if it exists, otherwise use current_value
+            slider_value = st.session_state.get(f"slider_{category}", current_value)
+            
+            # Changes are tracked by the on_change callback and saved by the autosave fragment
+            st.slider(
+                "##",
+                min_value=0.0,
+                max_value=float(max_value),
+                value=slider_value,
+                step=0.5,
+                key=f"slider_{category}",
+                on_change=mark_slider_changed,
+                label_visibility="collapsed"
+            )
+
+@st.fragment
+def show_progress_chart():
+    """Progress chart and summary table for the saved entries"""
+    if not st.session_state.daily_entries:
+        st.info("No entries yet")
+        return
+    progress_df = build_progress_df(st.session_state.daily_entries)
+    if progress_df.empty:
+        return
+    
+    # Create a more compact bar chart (spec reused while the entries are unchanged)
+    show_bar_chart(
+        progress_df[["category", "percentage"]],
+        x="category",
+        y="percentage",
+        title="Daily Progress (%)",
+        layout=dict(
+            height=300,
+            margin=dict(l=10, r=10, t=30, b=10),
+            yaxis_range=[0, 100],
+            xaxis_tickangle=45
+        )
+    )
+    
+    # Compact summary table
+    summary = progress_df[["category", "amount", "required"]]
+    summary.columns = ["Category", "Consumed", "Required"]
+    st.dataframe(
+        summary,
+        hide_index=True,
+        use_container_width=True,
+        height=150
+    )
 
 
 # Sidebar for navigation
@@ -327,6 +674,9 @@ if page == "Daily Tracking":
     
     # If date changed, force reload of data
     if st.session_state.previous_date != selected_date_str:
+        # Don't lose unsaved edits to the day being left
+        save_dirty_values(st.session_state.previous_date)
+        
         st.session_state.daily_entries = None  # Clear cached entries
         st.session_state.last_update = None    # Reset last update time
         
@@ -341,173 +691,31 @@ if page == "Daily Tracking":
     # Initialize session state for save button
     if 'save_status' not in st.session_state:
         st.session_state.save_status = ""
-    if 'last_saved_values' not in st.session_state:
-        st.session_state.last_saved_values = {}
     
     # Update data only when needed
     if (st.session_state.daily_entries is None or 
         st.session_state.last_update is None or 
         (datetime.now() - st.session_state.last_update).seconds > 300):
-        st.session_state.daily_entries = load_daily_entries(selected_date_str)
-        st.session_state.last_update = datetime.now()
+        load_selected_day(selected_date_str)
+        if st.session_state.loaded_date is None:
+            st.warning("Couldn't reach the API; showing changes saved on this device")
     
-    # Calculate and display overall completion at the top
-    if st.session_state.daily_entries:
-        df = pd.DataFrame(st.session_state.daily_entries)
-        if not df.empty:
-            # Calculate progress
-            progress_df = df.groupby("category")["amount"].sum().reset_index()
-            progress_df["required"] = progress_df["category"].map(
-                lambda x: DAILY_REQUIREMENTS.get(x, {"amount": 1.0})["amount"]
-            )
-            progress_df["unit"] = progress_df["category"].map(
-                lambda x: DAILY_REQUIREMENTS.get(x, {"unit": "exchange"})["unit"]
-            )
-            progress_df["percentage"] = (progress_df["amount"] / progress_df["required"] * 100).clip(0, 100)
-            
-            # Calculate overall completion
-            overall_completion = calculate_overall_completion(progress_df)
-            target_completion = get_time_based_completion_target()
-            
-            # Display completion metrics
-            col_metric1, col_metric2, col_metric3 = st.columns(3)
-            with col_metric1:
-                st.metric("Overall Completion", f"{overall_completion:.1f}%")
-            with col_metric2:
-                st.metric("Target for Current Time", f"{target_completion}%")
-            with col_metric3:
-                time_remaining = "Calculating..."  # Placeholder for time remaining
-                st.metric("Time Until Next Reset", time_remaining)
-            
-            # Show smart suggestions
-            st.subheader("Smart Suggestions")
-            suggestions = get_smart_suggestions(overall_completion, target_completion, progress_df)
-            for suggestion in suggestions:
-                st.markdown(suggestion)
-            
-            # Add visual separator
-            st.markdown("---")
+    # Each section is a fragment: moving a slider reruns only the slider panel,
+    # while saves, resets and copies rerun the whole page to refresh the rest
+    show_completion_metrics()
     
     # Create columns with adjusted ratio for mobile
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        # Dictionary to store slider values
-        slider_values = {}
-        consumed = get_consumed_amounts()
-        
-        # Prepare slider values for all categories first - this ensures they're populated before save
-        for category in DAILY_REQUIREMENTS.keys():
-            current_value = consumed.get(category, 0)
-            slider_values[category] = st.session_state.get(f"slider_{category}", current_value)
-        
-        # Add Reset, Copy from Yesterday, and Save All Changes buttons at the top
-        col_reset, col_copy, col_save = st.columns(3)
-        with col_reset:
-            if st.button("Reset All Values", type="secondary", use_container_width=True):
-                reset_sliders_locally()  # Only reset sliders locally
-                st.success("All slider values reset to 0")
-                st.rerun()
-        with col_copy:
-            if st.button("Copy from Yesterday", type="primary", use_container_width=True):
-                success, message = copy_from_yesterday(selected_date_str)
-                if success:
-                    st.success(message)
-                    update_progress_data(selected_date_str)
-                    st.rerun()
-                else:
-                    st.error(message)
-        with col_save:
-            if st.button("Save All Changes", type="primary", use_container_width=True):
-                # Log what we're sending to help debugging
-                print(f"Saving entries for date: {selected_date_str}")
-                print(f"Slider values being saved: {slider_values}")
-                
-                if save_entries(slider_values, selected_date_str):
-                    st.success("Saved!")
-                    update_progress_data(selected_date_str)  # Update cache after save
-                    st.session_state.pending_changes = 0  # Reset pending changes
-                    st.rerun()
-                else:
-                    st.error("Save failed")
-        
-        st.markdown("---")
-        
-        # Sort categories by completion status
-        sorted_categories = sort_categories_by_completion(consumed)
-        
-        # Create more compact sliders for each sorted category
-        for cat_info in sorted_categories:
-            category = cat_info['category']
-            req = cat_info['requirement']
-            current_value = consumed.get(category, 0)
-            max_value = req["amount"]
-            unit = req["unit"]
-            completion = cat_info['completion']
-            
-            # More compact display with completion indicator
-            col_label, col_slider = st.columns([1, 2])
-            with col_label:
-                status_emoji = "⚠️ " if completion < 100 else "✅ "
-                st.markdown(f"{status_emoji}**{category.title()}** ({unit})<br>{current_value:.1f}/{max_value:.1f}", unsafe_allow_html=True)
-            with col_slider:
-                # Use session state value if it exists, otherwise use current_value
-                slider_value = st.session_state.get(f"slider_{category}", current_value)
-                
-                # Update slider value in the UI and store in the dictionary
-                slider_values[category] = st.slider(
-                    "##",
-                    min_value=0.0,
-                    max_value=float(max_value),
-                    value=slider_value,
-                    step=0.5,
-                    key=f"slider_{category}",
-                    label_visibility="collapsed"
-                )
-                
-                # Track changes for smarter auto-save
-                if slider_value != current_value:
-                    st.session_state.pending_changes += 1
+        show_autosave_status(selected_date_str)
+        show_slider_panel(selected_date_str)
     
     with col2:
-        if st.session_state.daily_entries:
-            df = pd.DataFrame(st.session_state.daily_entries)
-            if not df.empty:
-                progress_df = df.groupby("category")["amount"].sum().reset_index()
-                
-                # Calculate percentage of daily requirement met with error handling
-                def get_requirement(category):
-                    if category in DAILY_REQUIREMENTS:
-                        return DAILY_REQUIREMENTS[category]["amount"]
-                    return 1.0  # Default value for unknown categories
-                
-                progress_df["required"] = progress_df["category"].map(get_requirement)
-                progress_df["percentage"] = (progress_df["amount"] / progress_df["required"] * 100).clip(0, 100)
-                
-                # Create a more compact bar chart
-                fig = px.bar(progress_df,
-                            x="category",
-                            y="percentage",
-                            title="Daily Progress (%)")
-                fig.update_layout(
-                    height=300,
-                    margin=dict(l=10, r=10, t=30, b=10),
-                    yaxis_range=[0, 100],
-                    xaxis_tickangle=45
-                )
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Compact summary table
-                summary = progress_df[["category", "amount", "required"]]
-                summary.columns = ["Category", "Consumed", "Required"]
-                st.dataframe(
-                    summary,
-                    hide_index=True,
-                    use_container_width=True,
-                    height=150
-                )
-        else:
-            st.info("No entries yet")
+        show_progress_chart()
+    
+    # Warm the neighbouring days so stepping through dates and copying from yesterday is instant
+    prefetch_adjacent_dates(selected_date)
 
 elif page == "View History":
     # Use the history module's show_history function
@@ -517,13 +725,14 @@ else:  # Recommendations page
     st.header("AI-Powered Recommendations")
     
     if st.button("Get Fresh Recommendations"):
-        with st.spinner("Getting AI recommendations..."):
-            recommendations = get_recommendations()
-            st.write(recommendations)
+        # Render chunks as they arrive instead of waiting for the full answer
+        st.write_stream(stream_recommendations())
     
     # Show current progress
     st.subheader("Today's Progress")
-    entries = load_daily_entries(date.today().strftime("%Y-%m-%d"))
+    entries, loaded = get_daily_entries(date.today().strftime("%Y-%m-%d"))
+    if not loaded:
+        st.warning("Couldn't reach the API; showing changes saved on this device")
     if entries:
         df = pd.DataFrame(entries)
         summary = df.groupby("category").agg({
@@ -538,9 +747,9 @@ else:  # Recommendations page
         st.dataframe(summary)
         
         # Visualize progress
-        fig = px.bar(summary, 
-                    x="Category", 
-                    y="% Complete", 
-                    title="Daily Requirements Completion (%)")
-        fig.update_layout(yaxis_range=[0, 100])
-        st.plotly_chart(fig)
\ No newline at end of file
+        show_bar_chart(summary[["Category", "% Complete"]],
+                       x="Category",
+                       y="% Complete",
+                       title="Daily Requirements Completion (%)",
+                       layout=dict(yaxis_range=[0, 100]),
+                       use_container_width=False)
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+Micro-benchmark for API response encoding and compression.
+
+Compares FastAPI's default path (jsonable_encoder + stdlib json) against
+orjson, and reports wire size for gzip and brotli, using payloads shaped like
+the /entries/batch/{start}/{end} range endpoint and the /foods/{category}
+catalog endpoint.
+
+Usage:
+    python benchmarks/bench_api_encoding.py [--days 365] [--items 400] [--repeat 50]
+"""
+
+import argparse
+import gzip
+import json
+import timeit
+from datetime import date, timedelta
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CATEGORIES = [
+    "cereal", "dried fruit", "fresh fruit", "legumes", "other vegetables",
+    "root vegetables", "free group", "jaggery", "soy milk", "sugar",
+    "oil ghee", "pa formula", "cal-c formula", "isoleucine", "valine",
+]
+
+
+def build_range_payload(days: int) -> dict:
+    """Build a payload shaped like the range endpoint response"""
+    start = date.today() - timedelta(days=days - 1)
+    result = {}
+    for i in range(days):
+        date_str = (start + timedelta(days=i)).isoformat()
+        result[date_str] = [
+            {
+                "category": category,
+                "food_item": category,
+                "amount": float(i % 7) / 2,
+                "unit": "exchange",
+                "notes": "Updated via slider",
+                "date": date_str,
+            }
+            for category in CATEGORIES
+        ]
+    return result
+
+
+def build_catalog_payload(items: int) -> list:
+    """Build a payload shaped like the catalog endpoint response"""
+    return [
+        {
+            "food_item": f"Food item {i}",
+            "portion_size": f"{(i % 20) + 5} g",
+            "exchange": "1",
+            "notes": None,
+        }
+        for i in range(items)
+    ]
+
+
+def encode_default(payload) -> bytes:
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def encode_orjson(payload) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS)
+
+
+def report(name: str, payload, repeat: int):
+    body = encode_orjson(payload)
+    default_ms = min(timeit.repeat(lambda: encode_default(payload), number=1, repeat=repeat)) * 1000
+    orjson_ms = min(timeit.repeat(lambda: encode_orjson(payload), number=1, repeat=repeat)) * 1000
+
+    print(f"\n{name}")
+    print(f"  encode  jsonable_encoder+json: {default_ms:8.3f} ms")
+    print(f"  encode  orjson:                {orjson_ms:8.3f} ms  ({default_ms / orjson_ms:.1f}x)")
+    print(f"  size    identity:              {len(body):8d} bytes")
+    print(f"  size    gzip:                  {len(gzip.compress(body, compresslevel=9)):8d} bytes")
+    if brotli is not None:
+        print(f"  size    brotli:                {len(brotli.compress(body, quality=4)):8d} bytes")
+    else:
+        print("  size    brotli:                (brotli not installed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API response encoding")
+    parser.add_argument("--days", type=int, default=365, help="Days in the range payload")
+    parser.add_argument("--items", type=int, default=400, help="Items in the catalog payload")
+    parser.add_argument("--repeat", type=int, default=50, help="Timing repetitions")
+    args = parser.parse_args()
+
+    report(f"Range payload ({args.days} days)", build_range_payload(args.days), args.repeat)
+    report(f"Catalog payload ({args.items} items)", build_catalog_payload(args.items), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
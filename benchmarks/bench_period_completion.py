@@ -0,0 +1,77 @@
+"""
+Micro-benchmark for history completion calculations.
+
+Compares the per-day path (calculate_completion_percentage called once per
+day, which runs the shared diet_summary formula) against the vectorized
+calculate_period_completion over the same range payload, and checks that both
+give the same numbers.
+
+Usage:
+    python benchmarks/bench_period_completion.py [--days 31 365 1095] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.config import DAILY_REQUIREMENTS  # noqa: E402
+from modules.history import calculate_completion_percentage, calculate_period_completion  # noqa: E402
+
+
+def build_range_payload(days: int) -> dict:
+    """Build a range endpoint payload; some days skip categories and some exceed requirements"""
+    start = date.today() - timedelta(days=days - 1)
+    result = {}
+    for i in range(days):
+        date_str = (start + timedelta(days=i)).isoformat()
+        result[date_str] = [
+            {
+                "category": category.title() if j % 4 == 0 else category,
+                "food_item": category,
+                "amount": requirement["amount"] * ((i + j) % 9) / 6,
+                "unit": requirement["unit"],
+                "notes": "Updated via slider",
+                "date": date_str,
+            }
+            for j, (category, requirement) in enumerate(DAILY_REQUIREMENTS.items())
+            if (i + j) % 5
+        ]
+    return result
+
+
+def per_day(payload: dict) -> dict:
+    return {date_str: calculate_completion_percentage(entries) for date_str, entries in payload.items()}
+
+
+def report(days: int, repeat: int):
+    payload = build_range_payload(days)
+
+    expected = per_day(payload)
+    actual = calculate_period_completion(payload)
+    max_diff = max(abs(expected[date_str] - actual.get(date_str, 0.0)) for date_str in expected)
+
+    per_day_ms = min(timeit.repeat(lambda: per_day(payload), number=1, repeat=repeat)) * 1000
+    vectorized_ms = min(timeit.repeat(lambda: calculate_period_completion(payload), number=1, repeat=repeat)) * 1000
+
+    print(f"\n{days} days")
+    print(f"  per-day formula:   {per_day_ms:9.2f} ms")
+    print(f"  vectorized:        {vectorized_ms:9.2f} ms  ({per_day_ms / vectorized_ms:.1f}x)")
+    print(f"  max difference:    {max_diff:.2e} %")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark period completion calculation")
+    parser.add_argument("--days", type=int, nargs="+", default=[31, 365, 1095], help="Period lengths in days")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions")
+    args = parser.parse_args()
+
+    for days in args.days:
+        report(days, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
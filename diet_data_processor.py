@@ -1,4 +1,5 @@
 import os
+import hashlib
 import pdfplumber
 import pandas as pd
 from pathlib import Path
@@ -11,6 +12,8 @@ class DietDataProcessor:
     def __init__(self, pdf_directory="dietpdfs"):
         self.pdf_directory = pdf_directory
         self.food_categories = {}
+        self.catalog_version = ""
+        self.prompt_fragments = {}
 
     def process_pdf(self, pdf_path):
         category_name = Path(pdf_path).stem.replace(" exchange", "").replace(" Exchange", "").lower()
@@ -45,8 +48,39 @@ class DietDataProcessor:
                 result = self.process_pdf(pdf_path)
                 if result:
                     self.food_categories.update(result)
+        self.catalog_version = self._compute_catalog_version()
+        self.prompt_fragments = self._build_prompt_fragments()
         return self.food_categories
 
+    def _compute_catalog_version(self):
+        """Hash the processed catalog so caches can tell when it changed"""
+        digest = hashlib.sha1()
+        for category in sorted(self.food_categories):
+            digest.update(category.encode("utf-8"))
+            digest.update(self.food_categories[category].to_json(orient="split").encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+    def _build_prompt_fragments(self, limit=5):
+        """Precompute the food option strings used in recommendation prompts"""
+        fragments = {}
+        for category, df in self.food_categories.items():
+            if df.empty:
+                continue
+            options = [
+                f"{food.get('food_item', 'Unknown')} ({food.get('portion_size', 'portion size not specified')})"
+                for food in df.head(limit).to_dict(orient='records')
+            ]
+            fragments[category] = {"options": options}
+        return fragments
+
+    def get_prompt_options(self, categories):
+        """Get the precomputed options for each category that has any"""
+        return {
+            category: self.prompt_fragments[category.lower()]["options"]
+            for category in categories
+            if category.lower() in self.prompt_fragments
+        }
+
     def get_food_choices(self, category):
         """Get all food choices for a given category"""
         return self.food_categories.get(category.lower(), pd.DataFrame())
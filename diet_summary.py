@@ -0,0 +1,115 @@
+"""
+Server-side daily progress summary.
+
+Computes the same per-category progress the Streamlit pages build with pandas
+(consumed vs required, clipped percentage, weighted overall completion and the
+time-of-day pacing target) so clients can render it directly.
+"""
+
+from datetime import datetime, time
+from typing import Any, Dict, List, Optional
+
+# Expected completion by time of day: (before this time, target %)
+PACING_TARGETS = [
+    (time(7, 0), 15),    # Breakfast
+    (time(10, 30), 25),  # Mid-morning
+    (time(13, 0), 50),   # Lunch
+    (time(16, 30), 65),  # Evening snack
+    (time(19, 30), 85),  # Dinner
+    (time(21, 0), 100),  # Before bed
+]
+
+
+def get_time_based_completion_target(now: Optional[datetime] = None) -> int:
+    """Get target completion percentage based on the time of day"""
+    current_time = (now or datetime.now()).time()
+    for target_time, target_pct in PACING_TARGETS:
+        if current_time < target_time:
+            return target_pct
+    return PACING_TARGETS[-1][1]
+
+
+def category_percentage(amount: float, required: float) -> float:
+    """Completion of one category, clipped to 0-100 (categories with no requirement count as complete)"""
+    return min(max(amount / required * 100, 0.0), 100.0) if required > 0 else 100.0
+
+
+def weighted_completion(consumed: Dict[str, float], requirements: List[Dict[str, Any]]) -> float:
+    """
+    Overall completion for a day, unrounded
+
+    Every requirement counts with its full weight (its required amount), so a
+    category with nothing logged scores 0% rather than being left out.
+    Categories without a requirement are ignored.
+
+    Args:
+        consumed: Normalized category -> amount consumed
+        requirements: Daily requirements (category, amount, unit)
+    """
+    weighted_total = 0.0
+    required_total = 0.0
+    for req in requirements:
+        required = float(req["amount"])
+        weighted_total += category_percentage(consumed.get(req["category"], 0.0), required) * required
+        required_total += required
+    return min(weighted_total / required_total, 100.0) if required_total > 0 else 0.0
+
+
+def sum_by_category(entries: List[Dict[str, Any]]) -> Dict[str, float]:
+    consumed: Dict[str, float] = {}
+    for entry in entries:
+        category = entry.get("category", "")
+        consumed[category] = consumed.get(category, 0.0) + float(entry.get("amount", 0) or 0)
+    return consumed
+
+
+def build_period_completion(
+    entries_by_date: Dict[str, List[Dict[str, Any]]], requirements: List[Dict[str, Any]]
+) -> Dict[str, float]:
+    """
+    Overall completion of every day in entries_by_date, rounded like build_daily_summary
+
+    Args:
+        entries_by_date: Date string -> entries for the day, with normalized categories
+        requirements: Daily requirements (category, amount, unit)
+    """
+    return {
+        date_str: round(weighted_completion(sum_by_category(entries), requirements), 1)
+        for date_str, entries in entries_by_date.items()
+    }
+
+
+def build_daily_summary(entries: List[Dict[str, Any]], requirements: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build per-category progress for one day
+
+    Args:
+        entries: Diet entries for the day, with normalized categories
+        requirements: Daily requirements (category, amount, unit)
+
+    Returns:
+        Dict with per-category consumed/required/remaining/percentage and
+        the weighted overall completion. Categories without a requirement
+        are ignored.
+    """
+    consumed = sum_by_category(entries)
+
+    categories = []
+    for req in requirements:
+        category = req["category"]
+        required = float(req["amount"])
+        amount = consumed.get(category, 0.0)
+
+        categories.append({
+            "category": category,
+            "unit": req.get("unit", "exchange"),
+            "consumed": amount,
+            "required": required,
+            "remaining": max(required - amount, 0.0),
+            "percentage": round(category_percentage(amount, required), 1)
+        })
+
+    return {
+        "categories": categories,
+        "overall_completion": round(weighted_completion(consumed, requirements), 1)
+    }
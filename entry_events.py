@@ -0,0 +1,160 @@
+"""
+Per-day entry change events for push clients.
+
+Events come from MongoDB change streams when the deployment supports them
+(replica sets / Atlas), so writes made by any process — the API, the MCP
+server, migrations — are seen. On a standalone server the broker falls back
+to in-process publishing from the API's own write endpoints.
+
+If the change stream fails it is reopened with exponential backoff, and
+in-process publishing covers this process's own writes in the meantime.
+
+Changes are coalesced per date over a short window, so a batch save of 15
+categories produces one event rather than 15.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from models import DIET_ENTRIES_COLLECTION, DIET_ENTRY_TOMBSTONES_COLLECTION
+
+# Backoff between attempts to (re)open the change stream, in seconds
+CHANGE_STREAM_RETRY_MIN = 1.0
+CHANGE_STREAM_RETRY_MAX = 300.0
+
+
+class EntryEventBroker:
+    """Fan out coalesced per-day change events to subscriber queues"""
+
+    def __init__(self, coalesce_delay: float = 0.2, queue_size: int = 100):
+        self.coalesce_delay = coalesce_delay
+        self.queue_size = queue_size
+        self.change_stream_active = False
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._listeners: List[Callable[[dict], None]] = []
+        self._pending: Dict[str, Set[str]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def start(self, database=None):
+        """Bind to the running loop and start watching the change stream if possible"""
+        self._loop = asyncio.get_running_loop()
+        if database is not None and self._watch_task is None:
+            self._watch_task = self._loop.create_task(self._watch_change_stream(database))
+
+    async def stop(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    @contextmanager
+    def subscribe(self):
+        """Register a subscriber queue for the duration of the block"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def add_listener(self, callback: Callable[[dict], None]):
+        """Call callback(event) on the event loop for every flushed event"""
+        self._listeners.append(callback)
+
+    def publish_local(self, date_str: str, categories: Iterable[str]):
+        """
+        Publish a write made by this process.
+
+        Ignored while the change stream is active, since the stream will
+        deliver the same write.
+        """
+        if self.change_stream_active:
+            return
+        self._enqueue(date_str, categories)
+
+    def _enqueue(self, date_str: str, categories: Iterable[str]):
+        if self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not self._loop:
+            # Called from a worker thread
+            self._loop.call_soon_threadsafe(self._enqueue, date_str, list(categories))
+            return
+
+        self._pending.setdefault(date_str, set()).update(categories)
+        if self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.coalesce_delay, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        timestamp = datetime.utcnow().isoformat()
+
+        for date_str, categories in pending.items():
+            event = {
+                "date": date_str,
+                "categories": sorted(categories),
+                "timestamp": timestamp
+            }
+            for callback in self._listeners:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"Entry events: listener failed ({e})")
+            for queue in list(self._subscribers):
+                if queue.full():
+                    # Slow consumer: drop its oldest event rather than block writers
+                    queue.get_nowait()
+                queue.put_nowait(event)
+
+    async def _watch_change_stream(self, database):
+        pipeline = [{
+            "$match": {
+                "ns.coll": {"$in": [DIET_ENTRIES_COLLECTION, DIET_ENTRY_TOMBSTONES_COLLECTION]},
+                "operationType": {"$in": ["insert", "update", "replace"]}
+            }
+        }]
+        delay = CHANGE_STREAM_RETRY_MIN
+        while True:
+            connected = False
+            try:
+                async with database.watch(pipeline, full_document="updateLookup") as stream:
+                    while stream.alive:
+                        change = await stream.try_next()
+                        if not connected:
+                            # Only trust the stream once a getMore has succeeded
+                            connected = self.change_stream_active = True
+                            print("Entry events: using MongoDB change streams")
+                        if change is not None:
+                            self._handle_change(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Entry events: change stream unavailable, using in-process events ({e})")
+            finally:
+                self.change_stream_active = False
+            if connected:
+                # It worked before: try again soon rather than continuing an old backoff
+                delay = CHANGE_STREAM_RETRY_MIN
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CHANGE_STREAM_RETRY_MAX)
+
+    def _handle_change(self, change: dict):
+        document = change.get("fullDocument") or {}
+        entry_date = document.get("date")
+        if isinstance(entry_date, datetime):
+            self._enqueue(entry_date.date().isoformat(), [document.get("category", "")])
+
+
+# Process-wide broker
+entry_events = EntryEventBroker()
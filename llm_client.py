@@ -0,0 +1,302 @@
+"""
+Process-wide LLM client used for meal recommendations.
+
+The client is created once per process and reused, so provider setup (API
+configuration, model construction and the underlying connection pool) isn't
+repeated for every request. Providers are pluggable: "gemini" talks to Google
+Gemini, "stub" returns canned text locally for tests and benchmarks.
+
+Provider SDK calls are blocking, so they run on a bounded thread pool with a
+per-call timeout and a global cap on concurrent calls; a slow model never
+stalls the event loop.
+
+Token counts for every call are estimated locally (count_tokens) and kept
+on the client, so prompt size and response length can be tracked without a
+provider round trip.
+
+Settings (environment):
+    LLM_PROVIDER          gemini (default) or stub
+    LLM_MODEL             model name (default gemini-1.5-flash)
+    LLM_TIMEOUT_SECONDS   per-call timeout (default 30)
+    LLM_MAX_CONCURRENCY   maximum concurrent LLM calls (default 4)
+    LLM_STUB_LATENCY      simulated latency of the stub provider in seconds (default 0)
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, Optional, Type
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Dedicated pool so slow LLM calls never starve the default executor
+_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in text without calling the provider
+
+    Approximates BPE tokenizers: words cost one token per 6 letters, numbers
+    one per 3 digits and each punctuation mark one token.
+    """
+    tokens = 0
+    for piece in _TOKEN_RE.findall(text or ""):
+        if piece[0].isdigit():
+            tokens += -(-len(piece) // 3)
+        elif piece[0].isalpha():
+            tokens += -(-len(piece) // 6)
+        else:
+            tokens += 1
+    return tokens
+
+
+class LLMTimeoutError(Exception):
+    """Raised when an LLM call exceeds its timeout"""
+
+
+class LLMUnavailableError(Exception):
+    """Raised when the configured provider can't be used (e.g. missing API key)"""
+
+
+class LLMProvider:
+    """Blocking text-generation backend; subclasses implement generate and optionally stream"""
+
+    name = "base"
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, timeout: float) -> Iterator[str]:
+        """Yield text chunks; providers without streaming return the whole answer at once"""
+        yield self.generate(prompt, timeout)
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini via google-generativeai; the model and its channel are reused across calls"""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str):
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise LLMUnavailableError("Gemini API key not found in environment variables")
+
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        # The SDK timeout stops the worker thread too, not just our wait on it
+        response = self.model.generate_content(prompt, request_options={"timeout": timeout})
+        return response.text
+
+    def stream(self, prompt: str, timeout: float) -> Iterator[str]:
+        response = self.model.generate_content(prompt, stream=True, request_options={"timeout": timeout})
+        for chunk in response:
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+
+
+class StubProvider(LLMProvider):
+    """Deterministic local provider for tests and benchmarks"""
+
+    name = "stub"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.latency = float(os.getenv("LLM_STUB_LATENCY", "0"))
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        return "".join(self.stream(prompt, timeout))
+
+    def stream(self, prompt: str, timeout: float) -> Iterator[str]:
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        chunks = [
+            "1. IMMEDIATE RECOMMENDATIONS:\n",
+            f"   - Stub recommendation {digest} ({len(prompt)} prompt chars)\n",
+            "2. RECIPE IDEAS:\n   - Stub recipe\n",
+            "3. PLANNING FOR REMAINING DAY:\n   - Stub plan\n",
+        ]
+        for chunk in chunks:
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            yield chunk
+
+
+PROVIDERS: Dict[str, Type[LLMProvider]] = {
+    GeminiProvider.name: GeminiProvider,
+    StubProvider.name: StubProvider,
+}
+
+
+class LLMClient:
+    """Async facade over a provider with timeouts and a concurrency cap"""
+
+    def __init__(self, provider: LLMProvider, timeout: float = LLM_TIMEOUT_SECONDS,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.provider = provider
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._usage_lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.last_usage: Optional[Dict[str, int]] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def record_usage(self, prompt: str, response: str) -> Dict[str, int]:
+        """Record estimated token counts for one completed call"""
+        usage = {"prompt_tokens": count_tokens(prompt), "response_tokens": count_tokens(response)}
+        with self._usage_lock:
+            self.calls += 1
+            self.prompt_tokens += usage["prompt_tokens"]
+            self.response_tokens += usage["response_tokens"]
+            self.last_usage = usage
+        return usage
+
+    def usage_stats(self) -> Dict[str, object]:
+        with self._usage_lock:
+            return {
+                "provider": self.provider.name,
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "response_tokens": self.response_tokens,
+                "avg_prompt_tokens": round(self.prompt_tokens / self.calls, 1) if self.calls else 0.0,
+                "avg_response_tokens": round(self.response_tokens / self.calls, 1) if self.calls else 0.0,
+                "last_call": self.last_usage,
+            }
+
+    async def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        Generate a complete response without blocking the event loop
+
+        Raises:
+            LLMTimeoutError: If the provider doesn't answer in time
+        """
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+
+        async with self._get_semaphore():
+            try:
+                text = await asyncio.wait_for(
+                    loop.run_in_executor(_executor, self.provider.generate, prompt, timeout),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                raise LLMTimeoutError(f"LLM call timed out after {timeout:g}s")
+        self.record_usage(prompt, text or "")
+        return text
+
+    async def stream(self, prompt: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Stream response text chunks without blocking the event loop
+
+        The timeout applies to the wait for each chunk (time-to-first-token and
+        gaps between chunks), not to the whole response.
+
+        Raises:
+            LLMTimeoutError: If the provider stalls for longer than the timeout
+        """
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        # Set when the consumer stops (finished, timed out or went away) so the worker frees its pool thread
+        cancel = threading.Event()
+
+        def post(item):
+            if not cancel.is_set():
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        def produce():
+            # Runs on the LLM pool; hands chunks back to the loop as they arrive
+            chunks = None
+            try:
+                chunks = self.provider.stream(prompt, timeout)
+                for text in chunks:
+                    if cancel.is_set():
+                        break
+                    post(text)
+            except Exception as e:
+                post(e)
+            finally:
+                post(done)
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+
+        parts = []
+        async with self._get_semaphore():
+            loop.run_in_executor(_executor, produce)
+            try:
+                while True:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        raise LLMTimeoutError(f"LLM stream stalled for more than {timeout:g}s")
+                    if item is done:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    parts.append(item)
+                    yield item
+            finally:
+                cancel.set()
+        self.record_usage(prompt, "".join(parts))
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def create_llm_client(provider_name: str = LLM_PROVIDER, model_name: str = LLM_MODEL) -> LLMClient:
+    """
+    Create a client for the named provider
+
+    Raises:
+        LLMUnavailableError: If the provider is unknown or can't be configured
+    """
+    provider_cls = PROVIDERS.get(provider_name)
+    if provider_cls is None:
+        raise LLMUnavailableError(f"Unknown LLM provider '{provider_name}'")
+    return LLMClient(provider_cls(model_name))
+
+
+def get_llm_client() -> LLMClient:
+    """
+    Get the process-wide client, creating it on first use
+
+    Raises:
+        LLMUnavailableError: If the configured provider can't be used
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_llm_client()
+    return _client
+
+
+def set_llm_client(client: Optional[LLMClient]):
+    """Replace the process-wide client (e.g. with a stub provider in tests)"""
+    global _client
+    with _client_lock:
+        _client = client
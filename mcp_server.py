@@ -15,20 +15,31 @@ Run modes:
 import argparse
 import json
 import os
-from datetime import date, datetime
+import time
+from datetime import date, datetime, timedelta
 from typing import Optional
 
-import google.generativeai as genai
 from dotenv import load_dotenv
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 
 from diet_data_processor import DietDataProcessor
+from recommendation_cache import create_recommendation_cache, get_meal_time, make_cache_key
+from llm_client import get_llm_client
+from meal_planner import MEALS_LEFT, MealPlanner, format_plan_text
+from prompt_builder import PromptBuilder
+from recommendation_telemetry import RecommendationTelemetry, summarize_telemetry
 from models import (
     DIET_ENTRIES_COLLECTION,
     DIET_REQUIREMENTS_COLLECTION,
+    delete_entries_with_tombstones,
     get_diet_entries_by_date,
+    get_diet_entries_for_dates,
     get_diet_requirements,
+    get_entry_changes,
+    get_recommendation_telemetry,
     init_db,
+    insert_recommendation_telemetry,
+    parse_change_cursor,
 )
 
 load_dotenv()
@@ -39,6 +50,10 @@ load_dotenv()
 db = init_db()
 diet_processor = DietDataProcessor()
 food_categories = diet_processor.process_all_pdfs()
+recommendation_cache = create_recommendation_cache()
+meal_planner = MealPlanner(food_categories)
+prompt_builder = PromptBuilder()
+telemetry = RecommendationTelemetry(insert_recommendation_telemetry)
 
 # ---------------------------------------------------------------------------
 # MCP server
@@ -84,6 +99,27 @@ def _serialize_entry(entry: dict) -> dict:
     }
 
 
+def _remaining_for_date(target_date: date) -> dict:
+    """Remaining amount per incomplete category for a date."""
+    start_of_day = datetime.combine(target_date, datetime.min.time())
+    end_of_day = datetime.combine(target_date, datetime.max.time())
+
+    food_history = list(db[DIET_ENTRIES_COLLECTION].find(
+        {"date": {"$gte": start_of_day, "$lte": end_of_day}}
+    ))
+    requirements = list(db[DIET_REQUIREMENTS_COLLECTION].find())
+
+    consumed = {e["category"]: e["amount"] for e in food_history}
+    remaining = {}
+    for req in requirements:
+        cat = req["category"]
+        required = req["amount"]
+        consumed_amount = consumed.get(cat, 0)
+        if consumed_amount < required:
+            remaining[cat] = {"amount": required - consumed_amount, "unit": req["unit"]}
+    return remaining
+
+
 # ---------------------------------------------------------------------------
 # Tools — diagnostics
 # ---------------------------------------------------------------------------
@@ -197,6 +233,50 @@ def get_entries_for_range(start_date: str, end_date: str) -> dict:
         return {"error": "Invalid date format. Use YYYY-MM-DD"}
 
 
+@mcp.tool()
+def get_entries_for_dates(dates: list[str]) -> dict:
+    """
+    Fetch diet entries for a list of arbitrary, non-contiguous dates in one
+    query (e.g. the same weekday across several weeks).
+
+    Args:
+        dates: Dates in YYYY-MM-DD format.
+
+    Returns:
+        A dict keyed by each requested date, each value a list of entries.
+    """
+    try:
+        parsed = [datetime.strptime(d, "%Y-%m-%d").date() for d in dates]
+    except ValueError:
+        return {"error": "Invalid date format. Use YYYY-MM-DD"}
+
+    result: dict = {d.isoformat(): [] for d in parsed}
+    for entry in get_diet_entries_for_dates(parsed):
+        result[entry.get("date").date().isoformat()].append(_serialize_entry(entry))
+    return result
+
+
+@mcp.tool()
+def get_entry_changes_since(since: Optional[str] = None, limit: int = 1000) -> dict:
+    """
+    Fetch entries created, updated or deleted after a cursor, to keep a local
+    mirror current without re-reading whole days.
+
+    Args:
+        since: ISO-8601 cursor returned as next_cursor by a previous call.
+               Omit for an initial full sync.
+        limit: Maximum number of changes per page.
+
+    Returns:
+        {"upserted": [...], "deleted": [...], "next_cursor": "...",
+         "has_more": bool, "resync_required": bool}
+    """
+    try:
+        return get_entry_changes(parse_change_cursor(since), max(limit, 1))
+    except ValueError:
+        return {"error": "Invalid cursor. Use an ISO-8601 timestamp"}
+
+
 # ---------------------------------------------------------------------------
 # Tools — diet entries (write)
 # ---------------------------------------------------------------------------
@@ -346,7 +426,7 @@ def reset_entries(date_str: Optional[str] = None) -> dict:
         start_of_day = datetime.combine(entry_date, datetime.min.time())
         end_of_day = datetime.combine(entry_date, datetime.max.time())
 
-        db[DIET_ENTRIES_COLLECTION].delete_many({"date": {"$gte": start_of_day, "$lte": end_of_day}})
+        delete_entries_with_tombstones(db, {"date": {"$gte": start_of_day, "$lte": end_of_day}})
 
         exchange_categories = {"cereal", "dried fruit", "fresh fruit", "legumes",
                                "other vegetables", "root vegetables", "free group"}
@@ -377,10 +457,13 @@ def reset_entries(date_str: Optional[str] = None) -> dict:
 # ---------------------------------------------------------------------------
 
 @mcp.tool()
-def get_recommendations(date_str: Optional[str] = None) -> dict:
+async def get_recommendations(date_str: Optional[str] = None, ctx: Optional[Context] = None) -> dict:
     """
     Generate AI-powered meal recommendations based on today's remaining
-    dietary requirements using Google Gemini.
+    dietary requirements using the configured LLM (Google Gemini by default).
+
+    The response is streamed: each chunk is sent as an info log message while
+    it is generated, so clients can render it incrementally.
 
     Args:
         date_str: Date in YYYY-MM-DD format. Defaults to today.
@@ -388,74 +471,106 @@ def get_recommendations(date_str: Optional[str] = None) -> dict:
     Returns:
         {"recommendations": "<text>"} or {"error": "<message>"}.
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        return {"error": "GEMINI_API_KEY not set in environment"}
-
     try:
         target_date = date.today()
         if date_str:
             target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
 
-        start_of_day = datetime.combine(target_date, datetime.min.time())
-        end_of_day = datetime.combine(target_date, datetime.max.time())
-
-        food_history = list(db[DIET_ENTRIES_COLLECTION].find(
-            {"date": {"$gte": start_of_day, "$lte": end_of_day}}
-        ))
-        requirements = list(db[DIET_REQUIREMENTS_COLLECTION].find())
-
-        consumed = {e["category"]: e["amount"] for e in food_history}
-        remaining = {}
-        for req in requirements:
-            cat = req["category"]
-            required = req["amount"]
-            consumed_amount = consumed.get(cat, 0)
-            if consumed_amount < required:
-                remaining[cat] = {"amount": required - consumed_amount, "unit": req["unit"]}
-
-        available_foods = {}
-        for cat in remaining:
-            df = diet_processor.get_food_choices(cat)
-            if not df.empty:
-                available_foods[cat] = [
-                    f"{row.get('food_item', 'Unknown')} ({row.get('portion_size', 'n/a')})"
-                    for _, row in df.head(5).iterrows()
-                ]
-
-        current_hour = datetime.now().hour
-        meal_time = (
-            "breakfast" if current_hour < 11
-            else "lunch" if current_hour < 16
-            else "dinner" if current_hour < 22
-            else "snack"
+        remaining = _remaining_for_date(target_date)
+        meal_time = get_meal_time(datetime.now().hour)
+
+        started = time.perf_counter()
+        cache_key = make_cache_key(remaining, meal_time, diet_processor.catalog_version)
+        cached = recommendation_cache.get(cache_key)
+        if cached is not None:
+            telemetry.record("mcp", meal_time, (time.perf_counter() - started) * 1000, True, prompt=cached[0])
+            return {"recommendations": cached[1], "cached": True}
+
+        # Precomputed per catalog version, trimmed to the prompt token budget
+        prompt, _ = prompt_builder.build(
+            remaining, meal_time, diet_processor.get_prompt_options(remaining.keys())
         )
+    except Exception as exc:
+        return {"error": str(exc)}
 
-        remaining_details = "\n".join(
-            f"- {cat}: {details['amount']} {details['unit']} remaining"
-            for cat, details in remaining.items()
+    try:
+        llm = get_llm_client()
+
+        parts = []
+        async for text in llm.stream(prompt):
+            parts.append(text)
+            if ctx is not None:
+                await ctx.info(text)
+        recommendations = "".join(parts)
+        telemetry.record(
+            "mcp", meal_time, (time.perf_counter() - started) * 1000, False,
+            prompt=prompt, response=recommendations,
         )
+        recommendation_cache.set(cache_key, (prompt, recommendations))
+        return {"recommendations": recommendations, "cached": False}
 
-        prompt = f"""As a specialized pediatric nutritionist, provide recommendations for {meal_time}:
+    except Exception as exc:
+        telemetry.record("mcp", meal_time, (time.perf_counter() - started) * 1000, False, prompt=prompt, error=exc)
+        # LLM down, slow or not configured: fall back to the local planner
+        plan = meal_planner.plan(remaining, meal_time, target_date)
+        return {
+            "recommendations": format_plan_text(plan),
+            "cached": False,
+            "fallback": True,
+            "detail": str(exc),
+        }
+
+
+@mcp.tool()
+def get_meal_plan(date_str: Optional[str] = None, meal_time: Optional[str] = None) -> dict:
+    """
+    Plan concrete food items and portions for one meal locally, without the
+    LLM. Returns in milliseconds and works offline.
+
+    Args:
+        date_str:  Date in YYYY-MM-DD format. Defaults to today.
+        meal_time: breakfast, lunch, dinner or snack. Defaults to the current slot.
 
-REMAINING DAILY REQUIREMENTS:
-{remaining_details}
+    Returns:
+        {"meal_time": ..., "items": [...], "rest_of_day": {...}, "text": "..."}
+        or {"error": "<message>"}.
+    """
+    if meal_time is not None and meal_time not in MEALS_LEFT:
+        return {"error": f"meal_time must be one of {', '.join(MEALS_LEFT)}"}
+    try:
+        target_date = date.today()
+        if date_str:
+            target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
 
-AVAILABLE FOOD OPTIONS:
-{json.dumps(available_foods, indent=2)}
+        plan = meal_planner.plan(
+            _remaining_for_date(target_date),
+            meal_time or get_meal_time(datetime.now().hour),
+            target_date,
+        )
+        return {**plan, "text": format_plan_text(plan)}
+    except Exception as exc:
+        return {"error": str(exc)}
 
-Provide:
-1. IMMEDIATE RECOMMENDATIONS — specific food combinations for {meal_time} with exact portions.
-2. RECIPE IDEAS (2-3 kid-friendly) — using available ingredients, with portions and exchange values.
-3. PLANNING FOR REST OF DAY — how to distribute remaining exchanges across future meals.
 
-Keep suggestions child-appropriate, practical, and based only on listed foods."""
+@mcp.tool()
+def get_recommendation_cache_stats() -> dict:
+    """Return hit/miss statistics for the recommendation cache and LLM token usage."""
+    try:
+        llm_usage = get_llm_client().usage_stats()
+    except Exception:
+        llm_usage = None
+    return {**recommendation_cache.stats(), "llm_usage": llm_usage}
 
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return {"recommendations": response.text}
 
+@mcp.tool()
+def get_recommendation_metrics(window_minutes: Optional[int] = None) -> dict:
+    """
+    Return latency, token and error percentiles for recent recommendation
+    requests (API and MCP), optionally limited to the last window_minutes.
+    """
+    try:
+        since = datetime.utcnow() - timedelta(minutes=window_minutes) if window_minutes else None
+        return summarize_telemetry(get_recommendation_telemetry(since))
     except Exception as exc:
         return {"error": str(exc)}
 
@@ -0,0 +1,180 @@
+"""
+Local, deterministic meal planner.
+
+A fast alternative to the LLM: picks concrete food items from the exchange
+catalog and sizes their portions to close this meal's share of the remaining
+per-category requirements. Runs in milliseconds, needs no network or API key,
+and is used as the fallback when the LLM is slow or unavailable.
+
+The search is greedy: each category's target for the meal is split in
+half-exchange steps across a couple of catalog items, rotating through the
+catalog by day and meal so repeated plans don't always suggest the same food.
+"""
+
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from recommendation_cache import MEAL_BOUNDARIES
+
+# Smallest portion the planner suggests (matches the UI slider step)
+PORTION_STEP = 0.5
+
+# Main meals still ahead (including this one) when planning each slot
+MEALS_LEFT = {"breakfast": 3, "lunch": 2, "dinner": 1, "snack": 1}
+
+_QUANTITY_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(.*)$")
+
+
+def _round_step(amount: float, step: float = PORTION_STEP) -> float:
+    return round(amount / step) * step
+
+
+def _scale_portion(portion: str, exchanges: float) -> str:
+    """Scale a one-exchange portion like '30 g' by the number of exchanges"""
+    match = _QUANTITY_RE.match(portion or "")
+    if not match:
+        return f"{exchanges:g} x {portion}" if portion else f"{exchanges:g} exchange"
+    quantity, unit = match.groups()
+    return f"{float(quantity) * exchanges:g} {unit}".strip()
+
+
+class MealPlanner:
+    """Greedy planner over the food exchange catalog"""
+
+    def __init__(self, food_categories: Dict[str, pd.DataFrame], max_items_per_category: int = 2):
+        self.max_items_per_category = max_items_per_category
+        self._options = {
+            self._catalog_key(category): self._extract_options(df)
+            for category, df in food_categories.items()
+            if not df.empty
+        }
+
+    @staticmethod
+    def _catalog_key(category: str) -> str:
+        # Catalog names come from PDF file stems ("fresh-fruits"); requirements use "fresh fruit"
+        return category.lower().replace("-", " ").strip().rstrip("s")
+
+    @staticmethod
+    def _extract_options(df: pd.DataFrame) -> List[Tuple[str, str]]:
+        columns = list(df.columns)
+        name_col = "food_item" if "food_item" in columns else columns[0]
+        portion_col = "portion_size" if "portion_size" in columns else (columns[1] if len(columns) > 1 else None)
+        options = []
+        for record in df.to_dict(orient="records"):
+            name = record.get(name_col)
+            if not name:
+                continue
+            portion = record.get(portion_col) if portion_col else ""
+            options.append((str(name), str(portion or "")))
+        return options
+
+    def plan(
+        self,
+        remaining: Dict[str, Dict[str, Any]],
+        meal_time: str,
+        plan_date: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """
+        Plan concrete items for one meal
+
+        Args:
+            remaining: Category -> {"amount": remaining amount, "unit": unit}
+            meal_time: Meal slot (breakfast/lunch/dinner/snack)
+            plan_date: Date used to rotate through catalog items (default today)
+
+        Returns:
+            Dict with the planned items and what remains for the rest of the day
+        """
+        plan_date = plan_date or date.today()
+        share = 1 / MEALS_LEFT.get(meal_time, 1)
+        slots = [slot for _, slot in MEAL_BOUNDARIES]
+        rotation = plan_date.toordinal() * len(slots) + (slots.index(meal_time) if meal_time in slots else 0)
+
+        items = []
+        rest_of_day = {}
+        for category in sorted(remaining):
+            details = remaining[category]
+            amount = float(details["amount"])
+            unit = details.get("unit", "exchange")
+            if amount <= 0:
+                continue
+
+            # At least one step so small gaps still get planned, never more than what's left
+            target = min(max(_round_step(amount * share), PORTION_STEP), amount)
+            options = self._options.get(self._catalog_key(category), [])
+
+            if unit == "exchange" and options:
+                planned = self._split_exchanges(category, target, options, rotation)
+            else:
+                planned = [{
+                    "category": category,
+                    "food_item": category,
+                    "amount": target,
+                    "unit": unit,
+                    "portion": f"{target:g} {unit}",
+                }]
+            items.extend(planned)
+
+            left = round(amount - sum(item["amount"] for item in planned), 2)
+            if left > 0:
+                rest_of_day[category] = {"amount": left, "unit": unit}
+
+        return {
+            "meal_time": meal_time,
+            "items": items,
+            "rest_of_day": rest_of_day,
+        }
+
+    def _split_exchanges(
+        self, category: str, target: float, options: List[Tuple[str, str]], rotation: int
+    ) -> List[Dict[str, Any]]:
+        # Whole steps never exceed the target; what's left below one step is planned as a fractional portion
+        steps = int(target / PORTION_STEP + 1e-9)
+        remainder = round(target - steps * PORTION_STEP, 2)
+        if steps == 0:
+            name, portion = options[rotation % len(options)]
+            return [{
+                "category": category,
+                "food_item": name,
+                "amount": target,
+                "unit": "exchange",
+                "portion": _scale_portion(portion, target),
+            }]
+        item_count = max(1, min(self.max_items_per_category, steps, len(options)))
+        planned = []
+        for i in range(item_count):
+            # Spread the steps as evenly as possible; earlier items take the remainder
+            item_steps = steps // item_count + (1 if i < steps % item_count else 0)
+            exchanges = item_steps * PORTION_STEP
+            if i == item_count - 1:
+                exchanges = round(exchanges + remainder, 2)
+            name, portion = options[(rotation + i) % len(options)]
+            planned.append({
+                "category": category,
+                "food_item": name,
+                "amount": exchanges,
+                "unit": "exchange",
+                "portion": _scale_portion(portion, exchanges),
+            })
+        return planned
+
+
+def format_plan_text(plan: Dict[str, Any]) -> str:
+    """Render a plan as plain text in the same spirit as the LLM recommendations"""
+    lines = [f"1. IMMEDIATE RECOMMENDATIONS ({plan['meal_time']}):"]
+    if not plan["items"]:
+        lines.append("   - All daily requirements have been met!")
+    for item in plan["items"]:
+        lines.append(
+            f"   - {item['food_item']} ({item['category']}): "
+            f"{item['amount']:g} {item['unit']} - {item['portion']}"
+        )
+    if plan["rest_of_day"]:
+        lines.append("")
+        lines.append("2. PLANNING FOR REMAINING DAY:")
+        for category, details in plan["rest_of_day"].items():
+            lines.append(f"   - {category}: {details['amount']:g} {details['unit']} left after this meal")
+    return "\n".join(lines)
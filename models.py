@@ -1,7 +1,8 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, DESCENDING
+from pymongo.errors import CollectionInvalid
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional
 import certifi
 
@@ -12,6 +13,15 @@ DATABASE_NAME = os.getenv('MONGODB_DATABASE', 'diet_tracker')
 # MongoDB collections (equivalent to SQL tables)
 DIET_REQUIREMENTS_COLLECTION = 'diet_requirements'
 DIET_ENTRIES_COLLECTION = 'diet_entries'
+DIET_ENTRY_TOMBSTONES_COLLECTION = 'diet_entry_tombstones'
+RECOMMENDATION_TELEMETRY_COLLECTION = 'recommendation_telemetry'
+
+# How long deleted-entry tombstones are kept for delta sync clients
+TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', '30'))
+
+# Size of the capped recommendation telemetry collection (oldest records roll off)
+TELEMETRY_MAX_BYTES = int(os.getenv('TELEMETRY_MAX_BYTES', str(16 * 1024 * 1024)))
+TELEMETRY_MAX_RECORDS = int(os.getenv('TELEMETRY_MAX_RECORDS', '50000'))
 
 # Synchronous client for direct usage
 client = None
@@ -39,6 +49,20 @@ def init_db(mongo_uri=None):
     # Create indexes if needed
     db.diet_entries.create_index([("date", 1)])
     db.diet_entries.create_index([("category", 1)])
+    db.diet_entries.create_index([("timestamp", 1)])
+    db[DIET_ENTRY_TOMBSTONES_COLLECTION].create_index(
+        [("timestamp", 1)],
+        expireAfterSeconds=TOMBSTONE_RETENTION_DAYS * 24 * 3600
+    )
+    try:
+        db.create_collection(
+            RECOMMENDATION_TELEMETRY_COLLECTION,
+            capped=True,
+            size=TELEMETRY_MAX_BYTES,
+            max=TELEMETRY_MAX_RECORDS
+        )
+    except CollectionInvalid:
+        pass  # Already exists
     
     return db
 
@@ -130,6 +154,43 @@ def get_diet_entries_by_date(date_str: str) -> List[Dict[str, Any]]:
         print(f"Error retrieving diet entries: {e}")
         return []
 
+def get_diet_entries_for_dates(dates: List[date]) -> List[Dict[str, Any]]:
+    """Get diet entries for a set of (possibly non-contiguous) dates in one query"""
+    if db is None:
+        init_db()
+    
+    # Entries are stored at midnight, so an exact $in match covers each day
+    day_starts = [datetime.combine(day, datetime.min.time()) for day in set(dates)]
+    return list(db[DIET_ENTRIES_COLLECTION].find({"date": {"$in": day_starts}}))
+
+def get_daily_category_totals(start: date, end: date) -> List[Dict[str, Any]]:
+    """
+    Sum entry amounts per day and category over an inclusive date range
+    
+    The grouping runs in MongoDB, so only one row per day and category
+    comes back instead of every entry.
+    
+    Returns:
+        List of {"date": date, "category": str, "amount": float}
+    """
+    if db is None:
+        init_db()
+    
+    pipeline = [
+        {"$match": {"date": {
+            "$gte": datetime.combine(start, datetime.min.time()),
+            "$lte": datetime.combine(end, datetime.max.time())
+        }}},
+        {"$group": {
+            "_id": {"date": "$date", "category": "$category"},
+            "amount": {"$sum": "$amount"}
+        }}
+    ]
+    return [
+        {"date": row["_id"]["date"].date(), "category": row["_id"]["category"], "amount": float(row["amount"] or 0)}
+        for row in db[DIET_ENTRIES_COLLECTION].aggregate(pipeline)
+    ]
+
 async def get_diet_entries_async(date_str: str) -> List[Dict[str, Any]]:
     """Async version of getting diet entries for a specific date"""
     if async_db is None:
@@ -156,6 +217,124 @@ async def get_diet_entries_async(date_str: str) -> List[Dict[str, Any]]:
         print(f"Error retrieving diet entries asynchronously: {e}")
         return []
 
+def delete_entries_with_tombstones(database, query: Dict[str, Any]) -> int:
+    """Delete entries matching query and record a tombstone for each one"""
+    deleted = list(database[DIET_ENTRIES_COLLECTION].find(query, {"_id": 1, "date": 1, "category": 1}))
+    if not deleted:
+        return 0
+    
+    now = datetime.utcnow()
+    database[DIET_ENTRY_TOMBSTONES_COLLECTION].insert_many([
+        {
+            "entry_id": str(entry["_id"]),
+            "date": entry.get("date"),
+            "category": entry.get("category", ""),
+            "timestamp": now
+        }
+        for entry in deleted
+    ])
+    database[DIET_ENTRIES_COLLECTION].delete_many({"_id": {"$in": [entry["_id"] for entry in deleted]}})
+    return len(deleted)
+
+def _fetch_since(collection, since: datetime, limit: int) -> List[Dict[str, Any]]:
+    """Fetch documents with timestamp > since, never splitting documents that share the last timestamp"""
+    docs = list(collection.find({"timestamp": {"$gt": since}}).sort([("timestamp", 1), ("_id", 1)]).limit(limit))
+    if len(docs) == limit:
+        # Pull in the rest of the last timestamp so the next cursor doesn't skip them
+        last_ts = docs[-1]["timestamp"]
+        seen = [doc["_id"] for doc in docs if doc["timestamp"] == last_ts]
+        docs.extend(collection.find({"timestamp": last_ts, "_id": {"$nin": seen}}))
+    return docs
+
+def get_entry_changes(since: datetime, limit: int = 1000) -> Dict[str, Any]:
+    """
+    Get entries upserted and deleted after a cursor timestamp
+    
+    Args:
+        since: Naive UTC cursor; only changes strictly after it are returned
+        limit: Maximum number of upserts/deletes fetched per collection
+        
+    Returns:
+        Dict with upserted entries, deleted entry ids, the next cursor and
+        whether more changes are pending
+    """
+    if db is None:
+        init_db()
+    
+    upserted = _fetch_since(db[DIET_ENTRIES_COLLECTION], since, limit)
+    deleted = _fetch_since(db[DIET_ENTRY_TOMBSTONES_COLLECTION], since, limit)
+    has_more = len(upserted) >= limit or len(deleted) >= limit
+    
+    if has_more:
+        # Only advance the cursor as far as both feeds are complete
+        upserted_ts = upserted[-1]["timestamp"] if len(upserted) >= limit else None
+        deleted_ts = deleted[-1]["timestamp"] if len(deleted) >= limit else None
+        next_cursor = min(ts for ts in (upserted_ts, deleted_ts) if ts is not None)
+        upserted = [doc for doc in upserted if doc["timestamp"] <= next_cursor]
+        deleted = [doc for doc in deleted if doc["timestamp"] <= next_cursor]
+    else:
+        timestamps = [doc["timestamp"] for doc in upserted + deleted]
+        next_cursor = max(timestamps) if timestamps else since
+    
+    retention_start = datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    
+    return {
+        "upserted": [
+            {
+                "id": str(doc["_id"]),
+                "category": doc.get("category", ""),
+                "food_item": doc.get("food_item", ""),
+                "amount": float(doc.get("amount", 0)),
+                "unit": doc.get("unit", ""),
+                "notes": doc.get("notes", ""),
+                "date": doc.get("date").date().isoformat(),
+                "timestamp": doc["timestamp"].isoformat()
+            }
+            for doc in upserted
+        ],
+        "deleted": [
+            {
+                "id": doc["entry_id"],
+                "category": doc.get("category", ""),
+                "date": doc.get("date").date().isoformat() if doc.get("date") else None,
+                "timestamp": doc["timestamp"].isoformat()
+            }
+            for doc in deleted
+        ],
+        "next_cursor": next_cursor.isoformat(),
+        "has_more": has_more,
+        # Tombstones older than the retention window are gone; such clients must re-pull
+        "resync_required": datetime.min < since < retention_start
+    }
+
+def parse_change_cursor(since: Optional[str]) -> datetime:
+    """Parse an ISO-8601 change cursor into a naive UTC datetime (None means from the beginning)"""
+    if not since:
+        return datetime.min
+    cursor = datetime.fromisoformat(since)
+    if cursor.tzinfo is not None:
+        cursor = cursor.astimezone(timezone.utc).replace(tzinfo=None)
+    return cursor
+
+def insert_recommendation_telemetry(record: Dict[str, Any]):
+    """Append one recommendation telemetry record"""
+    if db is None:
+        init_db()
+    db[RECOMMENDATION_TELEMETRY_COLLECTION].insert_one(dict(record))
+
+def get_recommendation_telemetry(since: Optional[datetime] = None, limit: int = 5000) -> List[Dict[str, Any]]:
+    """Get the most recent telemetry records (newest first), optionally only after a UTC timestamp"""
+    if db is None:
+        init_db()
+    query = {"timestamp": {"$gte": since}} if since else {}
+    # Capped collections keep insertion order, so reverse natural order is newest first
+    return list(
+        db[RECOMMENDATION_TELEMETRY_COLLECTION]
+        .find(query, {"_id": 0})
+        .sort("$natural", DESCENDING)
+        .limit(limit)
+    )
+
 if __name__ == "__main__":
     # Initialize database connection when module is run directly
     init_db()
@@ -0,0 +1,267 @@
+"""
+HTTP client for the Diet Tracker API used by the Streamlit front end.
+
+One pooled requests.Session is shared per API URL, so calls reuse keep-alive
+connections instead of paying a TCP+TLS handshake each time. Every call has a
+timeout, and transient failures (connection errors, 502/503/504) are retried
+a bounded number of times with exponential backoff. The write endpoints
+(/entries/batch upserts, /entries/reset) are idempotent, so POSTs are retried
+too. Recommendation calls wait on the LLM with a long read timeout, so they
+go through a second session that never retries a read timeout.
+
+AsyncDietAPIClient offers the same reads on httpx for async callers; httpx is
+optional and the async client is only available when it is installed.
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:  # Optional: only needed for AsyncDietAPIClient
+    httpx = None
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 20)
+# Recommendations wait on the LLM
+RECOMMENDATION_TIMEOUT = (3.05, 90)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUSES = (502, 503, 504)
+POOL_SIZE = 10
+
+EntriesByDate = Dict[str, List[Dict[str, Any]]]
+
+
+def _date_str(day) -> str:
+    return day if isinstance(day, str) else day.strftime("%Y-%m-%d")
+
+
+def _date_range(start: date, end: date) -> List[str]:
+    return [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((end - start).days + 1)]
+
+
+class DietAPIClient:
+    """Pooled, retrying client for the Diet Tracker API"""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        pool_size: int = POOL_SIZE,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False,
+        )
+        self.session = self._make_session(retry)
+        # A read timeout here already cost RECOMMENDATION_TIMEOUT; retrying it would multiply the wait
+        self.long_session = self._make_session(retry.new(read=0))
+
+    def _make_session(self, retry: Retry) -> requests.Session:
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def request(self, method: str, path: str, retry_reads: bool = True, **kwargs) -> requests.Response:
+        """
+        Send a request with the default timeout (raises requests.RequestException once retries are exhausted)
+        
+        retry_reads=False uses the session that doesn't retry read timeouts, for long-running endpoints.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        session = self.session if retry_reads else self.long_session
+        return session.request(method, f"{self.base_url}{path}", **kwargs)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    # Entries
+
+    def get_entries(self, day) -> List[Dict[str, Any]]:
+        """Entries for one day ([] if the API answers with an error)"""
+        response = self.get(f"/entries/{_date_str(day)}")
+        return response.json() if response.status_code == 200 else []
+
+    def get_entries_range(self, start, end) -> EntriesByDate:
+        """Entries for an inclusive date range, keyed by date ({} on error)"""
+        response = self.get(f"/entries/batch/{_date_str(start)}/{_date_str(end)}")
+        return response.json() if response.status_code == 200 else {}
+
+    def lookup_entries(self, days: Iterable) -> EntriesByDate:
+        """Entries for a set of (possibly non-contiguous) dates in one request ({} on error)"""
+        response = self.post("/entries/lookup", json={"dates": [_date_str(day) for day in days]})
+        return response.json() if response.status_code == 200 else {}
+
+    def get_entries_many(self, days: Iterable, max_workers: int = 7) -> EntriesByDate:
+        """Entries for several days with concurrent per-day requests over the shared pool"""
+        date_strs = [_date_str(day) for day in days]
+        if not date_strs:
+            return {}
+
+        def load_day(date_str):
+            try:
+                return self.get_entries(date_str)
+            except requests.RequestException as e:
+                print(f"Failed to load entries for {date_str}: {e}")
+                return []
+
+        workers = max(1, min(max_workers, self.pool_size, len(date_strs)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            day_entries = list(pool.map(load_day, date_strs))
+        return {date_str: entries for date_str, entries in zip(date_strs, day_entries) if entries}
+
+    def get_entries_window(self, start: date, end: date) -> EntriesByDate:
+        """
+        Entries for every day from start to end (inclusive)
+
+        Uses one range request; if that fails, falls back to concurrent per-day
+        requests so the window still loads in about one round-trip.
+        """
+        try:
+            response = self.get(f"/entries/batch/{_date_str(start)}/{_date_str(end)}")
+            if response.status_code == 200:
+                return response.json()
+            print(f"Range request failed with status {response.status_code}, loading days concurrently")
+        except requests.RequestException as e:
+            print(f"Range request failed ({e}), loading days concurrently")
+        return self.get_entries_many(_date_range(start, end))
+
+    def get_completion(self, start, end) -> Dict[str, float]:
+        """Server-aggregated overall completion per day with entries ({} on error)"""
+        response = self.get(f"/summary/completion/{_date_str(start)}/{_date_str(end)}")
+        return response.json().get("days", {}) if response.status_code == 200 else {}
+
+    def get_entry_changes(self, since: Optional[str] = None, limit: int = 1000) -> Optional[Dict[str, Any]]:
+        """Entries upserted/deleted after a change cursor, or None if the feed can't be read"""
+        params: Dict[str, Any] = {"limit": limit}
+        if since:
+            params["since"] = since
+        try:
+            response = self.get("/entries/changes", params=params)
+        except requests.RequestException as e:
+            print(f"Failed to read the change feed: {e}")
+            return None
+        return response.json() if response.status_code == 200 else None
+
+    def post_entries(self, entries: List[Dict[str, Any]], day=None) -> requests.Response:
+        """Upsert entries (one per category) for a day (default today on the server)"""
+        payload: Dict[str, Any] = {"entries": entries}
+        if day:
+            payload["date"] = _date_str(day)
+        return self.post("/entries/batch", json=payload)
+
+    def save_entries(self, entries: List[Dict[str, Any]], day=None) -> bool:
+        """Like post_entries, but only reports whether the save succeeded"""
+        return self.post_entries(entries, day).status_code == 200
+
+    def reset_entries(self, day=None) -> bool:
+        """Reset a day's entries (default today on the server)"""
+        payload = {"date": _date_str(day)} if day else None
+        return self.post("/entries/reset", json=payload).status_code == 200
+
+    # Recommendations
+
+    def stream_recommendations(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (event, data) pairs from /recommendations/stream
+
+        Yields an ("error", {"detail": ...}) pair, and stops, if the stream can't
+        be opened or the connection fails part-way.
+        """
+        try:
+            with self.get(
+                "/recommendations/stream", retry_reads=False, stream=True, timeout=RECOMMENDATION_TIMEOUT
+            ) as response:
+                if response.status_code != 200:
+                    yield "error", {"detail": "Failed to get recommendations"}
+                    return
+                event = None
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                    elif line.startswith("data:"):
+                        yield event, json.loads(line[len("data:"):])
+        except requests.RequestException as e:
+            yield "error", {"detail": f"Failed to get recommendations: {e}"}
+
+
+class AsyncDietAPIClient:
+    """httpx-based async counterpart of DietAPIClient's read methods"""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        pool_size: int = POOL_SIZE,
+    ):
+        if httpx is None:
+            raise ImportError("httpx is required for AsyncDietAPIClient")
+        connect, read = timeout
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            # Retries connection failures; status-based retries are left to the sync client
+            transport=httpx.AsyncHTTPTransport(retries=retries),
+        )
+
+    async def get_entries(self, day) -> List[Dict[str, Any]]:
+        response = await self.client.get(f"/entries/{_date_str(day)}")
+        return response.json() if response.status_code == 200 else []
+
+    async def get_entries_range(self, start, end) -> EntriesByDate:
+        response = await self.client.get(f"/entries/batch/{_date_str(start)}/{_date_str(end)}")
+        return response.json() if response.status_code == 200 else {}
+
+    async def get_entries_many(self, days: Iterable) -> EntriesByDate:
+        """Entries for several days, fetched concurrently"""
+        date_strs = [_date_str(day) for day in days]
+        day_entries = await asyncio.gather(*(self.get_entries(date_str) for date_str in date_strs))
+        return {date_str: entries for date_str, entries in zip(date_strs, day_entries) if entries}
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+_clients: Dict[str, DietAPIClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_api_client(base_url: str) -> DietAPIClient:
+    """Get the process-wide client for an API URL (shared across reruns and sessions)"""
+    client = _clients.get(base_url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(base_url)
+            if client is None:
+                client = _clients[base_url] = DietAPIClient(base_url)
+    return client
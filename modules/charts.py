@@ -0,0 +1,55 @@
+"""
+Memoized chart specs for the Streamlit pages.
+
+Building a figure with plotly express is comparatively expensive: every call
+re-derives traces, axes and the full template from the DataFrame. Bar chart
+specs are cached per process, keyed on a hash of the chart's input data and
+its options, so reruns with unchanged data reuse the finished spec instead of
+building a new figure.
+"""
+
+import hashlib
+import json
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+CHART_CACHE_ENTRIES = 128
+
+
+def hash_frame(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame (values, column names and dtypes; the index is ignored)"""
+    digest = hashlib.sha1()
+    digest.update(json.dumps([[str(column), str(dtype)] for column, dtype in df.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+@st.cache_data(max_entries=CHART_CACHE_ENTRIES, show_spinner=False)
+def _bar_chart_spec(data_hash, options_json, _df):
+    # _df is not hashed by Streamlit; data_hash stands in for it
+    options = json.loads(options_json)
+    layout = options.pop("layout")
+    fig = px.bar(_df, **options)
+    fig.update_layout(**layout)
+    return fig.to_dict()
+
+
+def bar_chart_spec(df: pd.DataFrame, layout=None, **options) -> dict:
+    """
+    Cached px.bar figure spec
+
+    Args:
+        df: Chart data
+        layout: Keyword arguments for fig.update_layout
+        **options: Keyword arguments for px.bar (must be JSON-serializable,
+            so pass column names rather than Series)
+    """
+    options_json = json.dumps({**options, "layout": layout or {}}, sort_keys=True)
+    return _bar_chart_spec(hash_frame(df), options_json, df)
+
+
+def show_bar_chart(df: pd.DataFrame, layout=None, use_container_width=True, **options):
+    """Render a bar chart from the cached spec"""
+    st.plotly_chart(bar_chart_spec(df, layout, **options), use_container_width=use_container_width)
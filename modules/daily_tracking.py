@@ -1,8 +1,6 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from datetime import datetime, date, time
-import requests
+from datetime import datetime, date, time, timedelta
 import time
 
 from .utils import (
@@ -15,30 +13,36 @@ from .utils import (
     DAILY_REQUIREMENTS,
     CACHE_TTL
 )
+from .api_client import get_api_client
+from .history import calculate_completion_percentage, invalidate_month_data
+from .charts import show_bar_chart
 
 def load_diet_entries(date_str, api_url, cache_ttl=300):
     """Load daily entries with caching"""
     print(f"Loading entries for {date_str}")
-    response = requests.get(f"{api_url}/entries/{date_str}")
+    response = get_api_client(api_url).get(f"/entries/{date_str}")
     if response.status_code == 200:
-        data = response.json()
-        # Initialize all categories with 0 if they don't exist
-        all_entries = {category: 0.0 for category in DAILY_REQUIREMENTS.keys()}
-        # Update with actual values from database
-        for entry in data:
-            category = normalize_category(entry['category'])
-            all_entries[category] = float(entry['amount'])
-        
-        return [
-            {
-                "category": cat,
-                "amount": amt,
-                "unit": DAILY_REQUIREMENTS.get(cat, {"unit": "exchange"})["unit"]
-            }
-            for cat, amt in all_entries.items()
-        ]
+        return to_category_amounts(response.json())
     return []
 
+def to_category_amounts(data):
+    """Turn raw API entries into one entry per tracked category (missing categories are 0)"""
+    # Initialize all categories with 0 if they don't exist
+    all_entries = {category: 0.0 for category in DAILY_REQUIREMENTS.keys()}
+    # Update with actual values from database
+    for entry in data:
+        category = normalize_category(entry['category'])
+        all_entries[category] = float(entry['amount'])
+    
+    return [
+        {
+            "category": cat,
+            "amount": amt,
+            "unit": DAILY_REQUIREMENTS.get(cat, {"unit": "exchange"})["unit"]
+        }
+        for cat, amt in all_entries.items()
+    ]
+
 def save_entries(entries, api_url):
     """Save multiple entries in a single request"""
     entries_list = [
@@ -52,36 +56,29 @@ def save_entries(entries, api_url):
         for category, amount in entries.items()
     ]
     
-    response = requests.post(
-        f"{api_url}/entries/batch",
-        json={"entries": entries_list}
-    )
-    return response.status_code == 200
+    saved = get_api_client(api_url).save_entries(entries_list)
+    if saved:
+        invalidate_month_data(date.today())
+    return saved
 
 def reset_all_values(api_url):
     """Reset all values to 0 in the database"""
-    response = requests.post(f"{api_url}/entries/reset")
-    return response.status_code == 200
+    success = get_api_client(api_url).reset_entries()
+    if success:
+        invalidate_month_data(date.today())
+    return success
 
 def load_history_data(today, api_url):
     """Load history data once for efficiency"""
     if "history_data" not in st.session_state or not st.session_state.history_data:
+        # The whole week in one range request instead of one request per day
+        week_entries = get_api_client(api_url).get_entries_window(today - timedelta(days=6), today)
         history_data = []
         for i in range(7):
-            day = today - pd.Timedelta(days=i)
+            day = today - timedelta(days=i)
             date_str = day.strftime("%Y-%m-%d")
-            print(f"Loading history for {date_str}")
-            entries = load_diet_entries(date_str, api_url)
-            # Always add a day entry even if there are no entries
-            day_completion = 0
-            if entries:
-                day_df = pd.DataFrame(entries)
-                day_progress = day_df.groupby("category")["amount"].sum().reset_index()
-                day_progress["required"] = day_progress["category"].map(
-                    lambda x: DAILY_REQUIREMENTS.get(x, {"amount": 1.0})["amount"]
-                )
-                day_progress["percentage"] = (day_progress["amount"] / day_progress["required"] * 100).clip(0, 100)
-                day_completion = calculate_overall_completion(day_progress)
+            # Always add a day entry even if there are no entries (0%)
+            day_completion = calculate_completion_percentage(week_entries.get(date_str, []))
             
             history_data.append({
                 "date": day.strftime("%Y-%m-%d"),
@@ -161,20 +158,19 @@ def show_daily_tracking(api_url):
                 # Sort by date to ensure correct order
                 history_df = history_df.sort_values("date")
                 
-                fig = px.bar(
+                show_bar_chart(
                     history_df,
                     x="date",
                     y="completion",
                     title=f"Diet Completion History - Last {len(history_df)} days (%)",
-                    labels={"date": "Date", "completion": "Completion %"}
+                    labels={"date": "Date", "completion": "Completion %"},
+                    layout=dict(
+                        xaxis_tickangle=-45,
+                        yaxis_range=[0, 100],
+                        height=300,
+                        margin=dict(t=30, b=50)
+                    )
                 )
-                fig.update_layout(
-                    xaxis_tickangle=-45,
-                    yaxis_range=[0, 100],
-                    height=300,
-                    margin=dict(t=30, b=50)
-                )
-                st.plotly_chart(fig, use_container_width=True)
                 
                 if len(history_df) < 7:
                     st.info(f"Showing data for {len(history_df)} days. The chart will include up to 7 days of history as more data becomes available.")
@@ -260,17 +256,16 @@ def show_daily_tracking(api_url):
                 )
                 progress_df["percentage"] = (progress_df["amount"] / progress_df["required"] * 100).clip(0, 100)
                 
-                fig = px.bar(progress_df,
-                            x="category",
-                            y="percentage",
-                            title="Daily Progress (%)")
-                fig.update_layout(
-                    height=300,
-                    margin=dict(l=10, r=10, t=30, b=10),
-                    yaxis_range=[0, 100],
-                    xaxis_tickangle=45
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                show_bar_chart(progress_df[["category", "percentage"]],
+                               x="category",
+                               y="percentage",
+                               title="Daily Progress (%)",
+                               layout=dict(
+                                   height=300,
+                                   margin=dict(l=10, r=10, t=30, b=10),
+                                   yaxis_range=[0, 100],
+                                   xaxis_tickangle=45
+                               ))
                 
                 summary = progress_df[["category", "amount", "required"]]
                 summary.columns = ["Category", "Consumed", "Required"]
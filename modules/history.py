@@ -1,71 +1,122 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import calendar
 import requests
 from datetime import date, datetime, timedelta
-import plotly.express as px
-from .utils import normalize_category, get_daily_requirements, calculate_overall_completion
+import plotly.graph_objects as go
+from .utils import normalize_category, get_daily_requirements
 import functools
-import time
+from .api_client import get_api_client
+from .month_cache import MonthCache
+from diet_summary import build_period_completion
+from .charts import show_bar_chart
 
 # Import daily requirements
 DAILY_REQUIREMENTS = get_daily_requirements()
+# In the API's requirements format, for the shared completion formula
+REQUIREMENTS = [{"category": category, **details} for category, details in DAILY_REQUIREMENTS.items()]
+REQUIRED_CATEGORIES = [req["category"] for req in REQUIREMENTS]
+REQUIRED_AMOUNTS = np.array([float(req["amount"]) for req in REQUIREMENTS])
 
-# Cache for storing month data with expiration times
-MONTH_DATA_CACHE = {}
-CACHE_EXPIRY = 5 * 60  # 5 minutes in seconds
+@st.cache_resource
+def get_month_cache():
+    """Month completion cache shared by all sessions in this process"""
+    return MonthCache()
+
+def invalidate_month_data(day):
+    """Drop cached completion data for the month containing day (call after writes)"""
+    get_month_cache().invalidate_date(day)
 
 def load_diet_entries(date_str, api_url):
     """Load entries for a specific date"""
-    response = requests.get(f"{api_url}/entries/{date_str}")
-    if response.status_code == 200:
-        return response.json()
-    return []
+    return get_api_client(api_url).get_entries(date_str)
 
 def load_batch_entries(start_date_str, end_date_str, api_url):
     """Load entries for a date range using the batch API endpoint"""
-    response = requests.get(f"{api_url}/entries/batch/{start_date_str}/{end_date_str}")
-    if response.status_code == 200:
-        return response.json()
-    return {}
+    return get_api_client(api_url).get_entries_range(start_date_str, end_date_str)
+
+def load_entries_for_dates(date_strs, api_url):
+    """Load entries for a list of (possibly non-contiguous) dates in one request"""
+    return get_api_client(api_url).lookup_entries(date_strs)
+
+def load_entries_window(start, end, api_url):
+    """
+    Load entries for every day from start to end (inclusive), keyed by date string
+    
+    Uses one range request; if that fails, falls back to concurrent per-day
+    requests so the window still loads in about one round-trip.
+    """
+    return get_api_client(api_url).get_entries_window(start, end)
+
+def normalize_entries(entries):
+    return [{"category": normalize_category(entry["category"]), "amount": entry["amount"]} for entry in entries]
 
 def calculate_completion_percentage(entries):
-    """Calculate diet completion percentage for a day's entries"""
+    """Calculate diet completion percentage for a day's entries (the API's formula, one day at a time)"""
     if not entries:
         return 0.0
+    return build_period_completion({"": normalize_entries(entries)}, REQUIREMENTS)[""]
+
+def calculate_period_completion(entries_by_date):
+    """
+    Calculate the completion percentage of every day in a period at once
     
-    df = pd.DataFrame(entries)
-    if df.empty:
-        return 0.0
+    Same result as calling calculate_completion_percentage for each day (the
+    formula the API's summary and completion endpoints use: every requirement
+    counts with full weight, missing categories score 0%), but with one
+    long-format frame, one groupby/pivot and NumPy requirement arrays instead
+    of a loop per day.
+    
+    Args:
+        entries_by_date: Date string -> list of entries (the range endpoint payload)
         
-    df['category'] = df['category'].map(normalize_category)
-    progress = df.groupby("category")["amount"].sum().reset_index()
-    progress["required"] = progress["category"].map(
-        lambda x: DAILY_REQUIREMENTS.get(x, {"amount": 1.0})["amount"]
-    )
-    progress["percentage"] = (progress["amount"] / progress["required"] * 100).clip(0, 100)
+    Returns:
+        Date string -> completion percentage, for days that have entries
+    """
+    dates, categories, amounts = [], [], []
+    for date_str, entries in entries_by_date.items():
+        for entry in entries:
+            dates.append(date_str)
+            categories.append(entry["category"])
+            amounts.append(entry["amount"])
+    if not dates:
+        return {}
     
-    # Calculate weighted average for overall completion
-    if not progress.empty:
-        weighted_completion = (
-            (progress["percentage"] * progress["required"]).sum() / 
-            progress["required"].sum()
-        )
-        return min(weighted_completion, 100.0)
+    # Normalize each distinct raw category once rather than every row
+    normalized = {category: normalize_category(category) for category in set(categories)}
+    df = pd.DataFrame({
+        "date": dates,
+        "category": pd.Series(categories).map(normalized),
+        "amount": np.asarray(amounts, dtype=float),
+    })
+    
+    # Day x requirement totals: categories without a requirement are dropped,
+    # requirements a day has no entry for are 0
+    totals = (
+        df.groupby(["date", "category"])["amount"].sum()
+        .unstack("category")
+        .reindex(columns=REQUIRED_CATEGORIES)
+        .fillna(0.0)
+    )
     
-    return 0.0
+    values = totals.to_numpy()
+    has_requirement = REQUIRED_AMOUNTS > 0
+    percentage = np.where(
+        has_requirement,
+        np.clip(values / np.where(has_requirement, REQUIRED_AMOUNTS, 1.0) * 100, 0, 100),
+        100.0
+    )
+    required_total = REQUIRED_AMOUNTS.sum()
+    if required_total > 0:
+        completion = np.minimum(percentage @ REQUIRED_AMOUNTS / required_total, 100.0)
+    else:
+        completion = np.zeros(len(totals))
+    # Rounded like the API's values
+    return {date_str: round(value, 1) for date_str, value in zip(totals.index, completion.tolist())}
 
 def get_month_data(year, month, api_url):
     """Get diet completion data for all days in a month with efficient batch processing and caching"""
-    # Check if data is in cache and still valid
-    cache_key = f"{year}-{month}"
-    current_time = time.time()
-    
-    if cache_key in MONTH_DATA_CACHE:
-        cache_entry = MONTH_DATA_CACHE[cache_key]
-        if current_time - cache_entry["timestamp"] < CACHE_EXPIRY:
-            return cache_entry["data"]
-    
     # Get the first and last day of the month
     first_day = date(year, month, 1)
     last_day = date(year, month, calendar.monthrange(year, month)[1])
@@ -73,17 +124,21 @@ def get_month_data(year, month, api_url):
     # Get today's date to exclude future dates
     today = date.today()
     
+    # Drop months written since the last look, then check the cache. The current
+    # month is keyed by today too, since days past today are left empty.
+    month_cache = get_month_cache()
+    month_cache.sync(get_api_client(api_url).get_entry_changes)
+    cache_key = (year, month, min(today, last_day))
+    cached = month_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     # Initialize month_data with None values for all days of the month
     days_in_month = calendar.monthrange(year, month)[1]
     month_data = {day: None for day in range(1, days_in_month + 1)}
     
     # If the entire month is in the future, return empty data
     if first_day > today:
-        # Cache the result
-        MONTH_DATA_CACHE[cache_key] = {
-            "data": month_data,
-            "timestamp": current_time
-        }
         return month_data
     
     # Adjust last_day if it's in the future
@@ -103,30 +158,22 @@ def get_month_data(year, month, api_url):
         # Show initial progress message
         progress_text.text("Fetching month data...")
         
-        # Try to fetch batch data with retry logic
-        max_retries = 3
-        retry_delay = 1  # seconds
+        # The shared client retries connection errors with exponential backoff
         batch_data = {}
-        
-        for attempt in range(max_retries):
-            try:
-                progress_text.text(f"Fetching month data (attempt {attempt+1}/{max_retries})...")
-                batch_data = load_batch_entries(start_date_str, end_date_str, api_url)
-                if batch_data:  # If we got data successfully, break the retry loop
-                    break
-            except requests.exceptions.RequestException as e:
-                if attempt < max_retries - 1:  # If not the last attempt
-                    progress_text.text(f"Connection error: {str(e)}. Retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    progress_text.text(f"Failed to load data after {max_retries} attempts")
-                    st.error(f"Failed to load data: {str(e)}")
+        load_failed = False
+        try:
+            batch_data = load_batch_entries(start_date_str, end_date_str, api_url)
+        except requests.exceptions.RequestException as e:
+            load_failed = True
+            progress_text.text("Failed to load data")
+            st.error(f"Failed to load data: {str(e)}")
         
         progress_bar.progress(50)
         progress_text.text("Processing data...")
         
-        # Process the batch data and calculate completion percentages for each day
+        # Every day's completion in one groupby/pivot (same formula as the API)
+        completions = calculate_period_completion(batch_data)
+        
         total_days = (last_day - first_day).days + 1
         processed_days = 0
         
@@ -136,16 +183,8 @@ def get_month_data(year, month, api_url):
             if current_date > today:
                 continue
                 
-            date_str = current_date.strftime("%Y-%m-%d")
-            entries = batch_data.get(date_str, [])
-            
-            if entries:
-                # Calculate completion percentage for this day
-                completion = calculate_completion_percentage(entries)
-                month_data[day] = completion
-            else:
-                # No entries for this day (counts as 0% completion)
-                month_data[day] = 0.0
+            # No entries for this day counts as 0% completion
+            month_data[day] = completions.get(current_date.strftime("%Y-%m-%d"), 0.0)
             
             processed_days += 1
             if total_days > 0:
@@ -155,11 +194,9 @@ def get_month_data(year, month, api_url):
         progress_bar.empty()
         progress_text.empty()
     
-    # Cache the processed data
-    MONTH_DATA_CACHE[cache_key] = {
-        "data": month_data,
-        "timestamp": current_time
-    }
+    # Cache the processed data unless the fetch failed
+    if not load_failed:
+        month_cache.set(cache_key, month_data)
     
     return month_data
 
@@ -299,12 +336,88 @@ def show_month_calendar(year, month, month_data):
     # Render the HTML calendar
     st.markdown(html_calendar, unsafe_allow_html=True)
 
+def load_completion(start, end, api_url):
+    """Load server-aggregated completion per day (days without entries are missing)"""
+    return get_api_client(api_url).get_completion(start, end)
+
+def build_year_grid(year, completion, today):
+    """
+    Lay out a year's completion as a weekday x week grid
+    
+    Returns:
+        (values, hover texts, month tick positions, month tick labels); cells
+        outside the year or after today are None
+    """
+    first_day = date(year, 1, 1)
+    last_day = date(year, 12, 31)
+    # Week columns start on the Monday on or before January 1st
+    origin = first_day - timedelta(days=first_day.weekday())
+    weeks = (last_day - origin).days // 7 + 1
+    
+    values = [[None] * weeks for _ in range(7)]
+    texts = [[""] * weeks for _ in range(7)]
+    tick_positions, tick_labels = [], []
+    
+    current = first_day
+    while current <= last_day:
+        column = (current - origin).days // 7
+        if current.day == 1:
+            tick_positions.append(column)
+            tick_labels.append(calendar.month_abbr[current.month])
+        if current <= today:
+            value = completion.get(current.strftime("%Y-%m-%d"), 0.0)
+            values[current.weekday()][column] = value
+            texts[current.weekday()][column] = f"{current.strftime('%a %d %b %Y')}: {value:.1f}%"
+        current += timedelta(days=1)
+    
+    return values, texts, tick_positions, tick_labels
+
+def show_year_heatmap(year, completion, today):
+    """Display one year of daily completion as a heatmap"""
+    values, texts, tick_positions, tick_labels = build_year_grid(year, completion, today)
+    
+    fig = go.Figure(go.Heatmap(
+        z=values,
+        text=texts,
+        hoverinfo="text",
+        zmin=0,
+        zmax=100,
+        colorscale="Greens",
+        xgap=2,
+        ygap=2,
+        colorbar=dict(title="%", thickness=10)
+    ))
+    fig.update_layout(
+        title=str(year),
+        height=220,
+        margin=dict(l=40, r=10, t=30, b=20),
+        xaxis=dict(tickmode="array", tickvals=tick_positions, ticktext=tick_labels, showgrid=False),
+        yaxis=dict(
+            tickmode="array",
+            tickvals=list(range(7)),
+            ticktext=list(calendar.day_abbr),
+            autorange="reversed",
+            showgrid=False
+        ),
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # Average over the days of the year so far (days without entries count as 0%)
+    days_so_far = (min(today, date(year, 12, 31)) - date(year, 1, 1)).days + 1
+    if days_so_far > 0:
+        year_total = sum(
+            value for day_str, value in completion.items() if day_str.startswith(f"{year}-")
+        )
+        st.metric(f"{year} Average Completion", f"{year_total / days_so_far:.1f}%")
+        st.caption(f"Averaged over all {days_so_far} days of {year} so far. Days without entries count as 0%.")
+
 def show_history(api_url):
-    """Display history view with weekly and monthly views"""
+    """Display history view with weekly, monthly and yearly views"""
     st.header("Diet History")
     
     # Add tabs for different views (removed Daily View)
-    tab1, tab2 = st.tabs(["7-Day History", "Month View"])
+    tab1, tab2, tab3 = st.tabs(["7-Day History", "Month View", "Year View"])
     
     with tab1:
         # Weekly view (simplified)
@@ -312,11 +425,12 @@ def show_history(api_url):
         end_date = date.today()
         start_date = end_date - timedelta(days=6)
         
+        week_dates = [start_date + timedelta(days=i) for i in range(7)]
+        week_entries = load_entries_window(start_date, end_date, api_url)
+        
         weekly_data = {}
-        for i in range(7):
-            current_date = start_date + timedelta(days=i)
-            date_str = current_date.strftime("%Y-%m-%d")
-            entries = load_diet_entries(date_str, api_url)
+        for current_date in week_dates:
+            entries = week_entries.get(current_date.strftime("%Y-%m-%d"), [])
             completion = calculate_completion_percentage(entries)
             weekly_data[current_date.strftime("%a %d")] = completion
         
@@ -326,18 +440,17 @@ def show_history(api_url):
                 "Date": list(weekly_data.keys()),
                 "Completion": list(weekly_data.values())
             })
+            df["Label"] = df["Completion"].round(1).astype(str) + "%"
             
-            fig = px.bar(
+            show_bar_chart(
                 df,
                 x="Date",
                 y="Completion",
                 title="7-Day Completion History",
                 labels={"Completion": "Completion %"},
-                text=df["Completion"].round(1).astype(str) + "%"
+                text="Label",
+                layout=dict(yaxis_range=[0, 100])
             )
-            
-            fig.update_layout(yaxis_range=[0, 100])
-            st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No history data available")
     
@@ -388,4 +501,31 @@ def show_history(api_url):
                              f"{calendar.month_name[selected_month]} {worst_day}",
                              f"{days_by_completion[worst_day]:.1f}%")
         else:
-            st.info("No data available for the selected month")
\ No newline at end of file
+            st.info("No data available for the selected month")
+    
+    with tab3:
+        st.subheader("Year at a Glance")
+        
+        today = date.today()
+        col1, col2 = st.columns(2)
+        with col1:
+            last_year = st.selectbox("Through year",
+                                     range(today.year, today.year - 3, -1),
+                                     key="heatmap_year")
+        with col2:
+            year_count = st.selectbox("Years", [1, 2, 3], key="heatmap_years")
+        
+        first_year = last_year - year_count + 1
+        start = date(first_year, 1, 1)
+        end = min(date(last_year, 12, 31), today)
+        
+        # One aggregated request for the whole span
+        try:
+            completion = load_completion(start, end, api_url)
+        except requests.exceptions.RequestException as e:
+            st.error(f"Failed to load data: {str(e)}")
+            completion = None
+        
+        if completion is not None:
+            for year in range(last_year, first_year - 1, -1):
+                show_year_heatmap(year, completion, today)
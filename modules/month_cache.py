@@ -0,0 +1,116 @@
+"""
+Month completion cache for the history calendar.
+
+A bounded LRU cache shared by every Streamlit session in the process. Entries
+are per month and invalidated when entries for that month change:
+
+- immediately, when this front end saves or resets a day (invalidate_date), and
+- from the API's change feed (/entries/changes), polled at most every
+  sync_interval seconds, so writes from other clients are picked up too.
+
+A TTL remains as a backstop in case the feed can't be reached.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Initial change cursor is set this far in the past to absorb clock skew with the API
+CURSOR_SKEW = timedelta(minutes=5)
+
+
+class MonthCache:
+    """Thread-safe LRU of month data keyed by (year, month, ...) with change-feed invalidation"""
+
+    def __init__(self, max_months: int = 24, ttl_seconds: float = 3600, sync_interval: float = 5):
+        self.max_months = max_months
+        self.ttl_seconds = ttl_seconds
+        self.sync_interval = sync_interval
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._cursor = (datetime.utcnow() - CURSOR_SKEW).isoformat()
+        self._last_sync = float("-inf")
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or time.monotonic() - item[0] > self.ttl_seconds:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Tuple, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_months:
+                self._entries.popitem(last=False)
+
+    def invalidate_month(self, year: int, month: int):
+        """Drop every cached variant of a month"""
+        with self._lock:
+            stale = [key for key in self._entries if key[:2] == (year, month)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def invalidate_date(self, day):
+        """Drop the month containing a date (date or YYYY-MM-DD string)"""
+        if isinstance(day, str):
+            day = datetime.strptime(day, "%Y-%m-%d").date()
+        self.invalidate_month(day.year, day.month)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def sync(self, fetch_changes: Callable[[str], Optional[Dict[str, Any]]]):
+        """
+        Invalidate months changed since the last sync
+
+        Args:
+            fetch_changes: Takes a change cursor and returns the /entries/changes
+                payload, or None if the feed couldn't be read
+        """
+        with self._lock:
+            if time.monotonic() - self._last_sync < self.sync_interval:
+                return
+            self._last_sync = time.monotonic()
+            cursor = self._cursor
+
+        changes = fetch_changes(cursor)
+        if changes is None:
+            return
+        if changes.get("resync_required") or changes.get("has_more"):
+            # Too far behind to tell which months changed
+            self.clear()
+        else:
+            changed = {
+                change["date"]
+                for change in changes.get("upserted", []) + changes.get("deleted", [])
+            }
+            if None in changed:
+                self.clear()
+            for day in changed - {None}:
+                self.invalidate_date(day)
+        with self._lock:
+            self._cursor = changes.get("next_cursor", cursor)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_months": self.max_months,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
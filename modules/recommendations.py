@@ -1,15 +1,16 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import openai
 from .utils import normalize_category, get_daily_requirements
+from .api_client import get_api_client
 
 def get_meal_recommendations(api_url, openai_api_key):
     """Generate AI-powered meal recommendations based on current progress"""
     
     # Get today's entries
-    response = requests.get(f"{api_url}/entries/{date.today().strftime('%Y-%m-%d')}")
+    response = get_api_client(api_url).get(f"/entries/{date.today().strftime('%Y-%m-%d')}")
     if response.status_code != 200:
         return "Unable to fetch current progress"
     
@@ -80,14 +81,10 @@ def show_recommendations(api_url):
     # Get last 7 days of data
     end_date = date.today()
     start_date = end_date - timedelta(days=7)
-    response = requests.get(
-        f"{api_url}/entries/range",
-        params={'start_date': start_date.strftime('%Y-%m-%d'),
-                'end_date': end_date.strftime('%Y-%m-%d')}
-    )
+    entries_by_date = get_api_client(api_url).get_entries_range(start_date, end_date)
     
-    if response.status_code == 200:
-        entries = response.json()
+    if entries_by_date:
+        entries = [entry for day_entries in entries_by_date.values() for entry in day_entries]
         if entries:
             df = pd.DataFrame(entries)
             df['date'] = pd.to_datetime(df['date'])
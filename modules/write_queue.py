@@ -0,0 +1,251 @@
+"""
+Persistent write queue for entry saves.
+
+Saves are written to a local SQLite file first and sent to the API by a
+background thread, so a save returns as soon as it is on disk and survives
+the API cold-starting, brief outages and app restarts.
+
+- One row per day: a save for a day that is still queued is merged into it
+  (later values win per category), so a burst of slider changes becomes one
+  upsert.
+- Due rows are sent oldest first. A transient failure (connection error,
+  5xx, 408/429) is retried with exponential backoff (base_backoff *
+  2^attempts, capped at max_backoff) and ends the pass, since the API is most
+  likely unreachable.
+- A save the API rejects outright (any other 4xx) will never succeed as
+  sent, so it is moved to a rejected_saves table for the UI to surface and
+  the pass continues with the next day.
+- A row merged into while its send was in flight stays queued and is sent
+  again with the newer values (upserts are idempotent).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_saves (
+    day TEXT PRIMARY KEY,
+    entries TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS rejected_saves (
+    day TEXT NOT NULL,
+    entries TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    error TEXT,
+    rejected_at REAL NOT NULL
+);
+"""
+
+# Client errors that may succeed on a later attempt
+RETRYABLE_CLIENT_STATUSES = (408, 425, 429)
+
+
+def is_rejection(status: int) -> bool:
+    """Whether an HTTP status means the API will never accept the save as sent"""
+    return 400 <= status < 500 and status not in RETRYABLE_CLIENT_STATUSES
+
+
+class WriteQueue:
+    """SQLite-backed queue of per-day entry saves with a background sender"""
+
+    def __init__(
+        self,
+        path: str,
+        sender: Callable[[str, List[Dict[str, Any]]], int],
+        on_sent: Optional[Callable[[str], None]] = None,
+        base_backoff: float = 2.0,
+        max_backoff: float = 300.0,
+        poll_interval: float = 2.0,
+    ):
+        """
+        Args:
+            path: SQLite file holding the queue
+            sender: Sends one day's entries to the API and returns the HTTP
+                status; raising counts as a transient failure
+            on_sent: Called with the day after its entries were sent
+        """
+        self.path = path
+        self.sender = sender
+        self.on_sent = on_sent
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sent = 0
+        self.failures = 0
+        self.rejections = 0
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection committed on success and always closed"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, day: str, entries: List[Dict[str, Any]]):
+        """Queue entries for a day, merging them into a save already queued for that day"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT entries FROM pending_saves WHERE day = ?", (day,)).fetchone()
+            merged = json.loads(row[0]) if row else {}
+            merged.update({entry["category"]: entry for entry in entries})
+            if row:
+                conn.execute(
+                    "UPDATE pending_saves SET entries = ?, version = version + 1 WHERE day = ?",
+                    (json.dumps(merged), day),
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO pending_saves (day, entries, seq) "
+                    "SELECT ?, ?, COALESCE(MAX(seq), 0) + 1 FROM pending_saves",
+                    (day, json.dumps(merged)),
+                )
+        self._wake.set()
+
+    def pending(self, day: str) -> Dict[str, float]:
+        """Queued amounts for a day by category (empty if nothing is queued)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT entries FROM pending_saves WHERE day = ?", (day,)).fetchone()
+        if not row:
+            return {}
+        return {category: float(entry["amount"]) for category, entry in json.loads(row[0]).items()}
+
+    def discard(self, day: str):
+        """Drop a day's queued save (e.g. before resetting that day)"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM pending_saves WHERE day = ?", (day,))
+
+    def flush(self) -> int:
+        """Send due saves oldest first; returns the number sent"""
+        sent = 0
+        with self._flush_lock:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT day, entries, version, attempts FROM pending_saves "
+                    "WHERE next_attempt_at <= ? ORDER BY seq",
+                    (time.time(),),
+                ).fetchall()
+            for day, entries_json, version, attempts in rows:
+                try:
+                    status = self.sender(day, list(json.loads(entries_json).values()))
+                except Exception as e:
+                    self._retry_later(day, attempts, str(e))
+                    break
+                if 200 <= status < 300:
+                    self._mark_sent(day, version)
+                    sent += 1
+                elif is_rejection(status):
+                    self._reject(day, status)
+                else:
+                    self._retry_later(day, attempts, f"HTTP {status}")
+                    break
+        return sent
+
+    def _mark_sent(self, day: str, version: int):
+        with self._lock, self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM pending_saves WHERE day = ? AND version = ?", (day, version)
+            ).rowcount
+            if not deleted:
+                # Merged into during the send; the newer values go out on the next pass
+                conn.execute(
+                    "UPDATE pending_saves SET attempts = 0, next_attempt_at = 0, last_error = NULL WHERE day = ?",
+                    (day,),
+                )
+        self.sent += 1
+        if self.on_sent:
+            try:
+                self.on_sent(day)
+            except Exception as e:
+                print(f"Post-save callback failed for {day}: {e}")
+
+    def _reject(self, day: str, status: int):
+        print(f"Queued save for {day} rejected by the API (HTTP {status}), not retrying")
+        self.rejections += 1
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO rejected_saves (day, entries, status, error, rejected_at) "
+                "SELECT day, entries, ?, ?, ? FROM pending_saves WHERE day = ?",
+                (status, f"HTTP {status}", time.time(), day),
+            )
+            conn.execute("DELETE FROM pending_saves WHERE day = ?", (day,))
+
+    def rejected(self) -> List[Dict[str, Any]]:
+        """Saves the API rejected, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT day, entries, status, error, rejected_at FROM rejected_saves ORDER BY rejected_at"
+            ).fetchall()
+        return [
+            {"day": day, "entries": json.loads(entries), "status": status, "error": error, "rejected_at": rejected_at}
+            for day, entries, status, error, rejected_at in rows
+        ]
+
+    def clear_rejected(self):
+        """Forget rejected saves once the user has seen them"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM rejected_saves")
+
+    def _retry_later(self, day: str, attempts: int, error: str):
+        delay = min(self.max_backoff, self.base_backoff * 2 ** attempts)
+        print(f"Queued save for {day} failed ({error}), retrying in {delay:.0f}s")
+        self.failures += 1
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE pending_saves SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE day = ?",
+                (time.time() + delay, error, day),
+            )
+
+    def start(self):
+        """Start the background sender (no-op if it is already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=self.poll_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Write queue flush failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            count, retrying = conn.execute(
+                "SELECT COUNT(*), SUM(attempts > 0) FROM pending_saves"
+            ).fetchone()
+            error = conn.execute(
+                "SELECT last_error FROM pending_saves WHERE last_error IS NOT NULL ORDER BY seq LIMIT 1"
+            ).fetchone()
+            rejected_count, rejected_days = conn.execute(
+                "SELECT COUNT(*), GROUP_CONCAT(DISTINCT day) FROM rejected_saves"
+            ).fetchone()
+        return {
+            "pending_days": count,
+            "retrying_days": retrying or 0,
+            "last_error": error[0] if error else None,
+            "rejected_saves": rejected_count,
+            "rejected_days": sorted(rejected_days.split(",")) if rejected_days else [],
+            "sent": self.sent,
+            "failures": self.failures,
+            "rejections": self.rejections,
+        }
@@ -0,0 +1,124 @@
+"""
+Token-budgeted prompt builder for meal recommendations.
+
+Prompt size drives LLM latency and cost, and the food options section grows
+with every unmet category. The builder keeps it bounded:
+
+- options are rendered one compact line per category instead of indented JSON,
+- food strings are whitespace-normalized and deduplicated (within and across
+  categories, keeping a food under the category with the most left to eat),
+- options are added round-robin, largest remaining category first, until the
+  prompt reaches the token budget.
+
+Settings (environment):
+    PROMPT_TOKEN_BUDGET   maximum estimated prompt tokens (default 700)
+"""
+
+import os
+from typing import Dict, Iterable, List, Tuple
+
+from llm_client import count_tokens
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "700"))
+
+PROMPT_TEMPLATE = """You are a pediatric nutritionist. Recommend food for {meal_time} for a child with special dietary needs.
+
+Remaining today:
+{remaining}
+
+Food options (category: food (one exchange portion)):
+{options}
+
+Reply with:
+1. IMMEDIATE RECOMMENDATIONS for {meal_time}: specific foods from the options, exact portions and exchange values, largest remaining categories first.
+2. RECIPE IDEAS: 2-3 kid-friendly combinations across categories, with portions, exchange values and simple preparation.
+3. PLANNING FOR REMAINING DAY: how to spread the remaining exchanges over later meals and any gaps to watch.
+
+Use only the listed foods and keep portions child-appropriate and practical."""
+
+
+def normalize_option(option: str) -> str:
+    """Collapse whitespace (PDF cells often contain line breaks)"""
+    return " ".join(str(option).split())
+
+
+def dedupe_options(
+    options: Dict[str, List[str]], order: Iterable[str]
+) -> Dict[str, List[str]]:
+    """
+    Normalize and deduplicate food strings
+
+    A food listed under several categories is kept only in the first category
+    of `order`.
+    """
+    seen = set()
+    result = {}
+    for category in order:
+        unique = []
+        for option in options.get(category, []):
+            option = normalize_option(option)
+            key = option.lower()
+            if option and key not in seen:
+                seen.add(key)
+                unique.append(option)
+        result[category] = unique
+    return result
+
+
+class PromptBuilder:
+    """Build recommendation prompts within an estimated token budget"""
+
+    def __init__(self, token_budget: int = PROMPT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+
+    def build(
+        self,
+        remaining: Dict[str, Dict],
+        meal_time: str,
+        options: Dict[str, List[str]],
+    ) -> Tuple[str, int]:
+        """
+        Build a prompt for the remaining requirements
+
+        Args:
+            remaining: Category -> {"amount": remaining amount, "unit": unit}
+            meal_time: Meal slot (breakfast/lunch/dinner/snack)
+            options: Category -> food option strings, best first
+
+        Returns:
+            (prompt, estimated prompt tokens)
+        """
+        # Categories with the most left to eat get options first
+        order = sorted(remaining, key=lambda category: (-float(remaining[category]["amount"]), category))
+        remaining_lines = "\n".join(
+            f"- {category}: {float(remaining[category]['amount']):g} {remaining[category]['unit']}"
+            for category in order
+        )
+        unique = dedupe_options(options, order)
+
+        base_tokens = count_tokens(self._render(meal_time, remaining_lines, []))
+        budget = self.token_budget - base_tokens
+        chosen: Dict[str, List[str]] = {category: [] for category in order}
+        depth = max((len(items) for items in unique.values()), default=0)
+        for i in range(depth):
+            for category in order:
+                items = unique[category]
+                if i >= len(items):
+                    continue
+                # Every option costs its own tokens plus a separator; the first one also pays for the line prefix
+                cost = count_tokens(f"{category}: {items[i]}" if i == 0 else f"; {items[i]}")
+                if cost <= budget:
+                    chosen[category].append(items[i])
+                    budget -= cost
+
+        lines = [f"{category}: {'; '.join(items)}" for category, items in chosen.items() if items]
+        prompt = self._render(meal_time, remaining_lines, lines)
+        return prompt, count_tokens(prompt)
+
+    @staticmethod
+    def _render(meal_time: str, remaining_lines: str, option_lines: List[str]) -> str:
+        return PROMPT_TEMPLATE.format(
+            meal_time=meal_time,
+            remaining=remaining_lines or "- nothing",
+            options="\n".join(option_lines) or "- none listed",
+        )
@@ -0,0 +1,130 @@
+"""
+Cache for AI meal recommendations.
+
+The Gemini prompt is fully determined by the remaining requirements, the meal
+slot and the food catalog, so responses are cached under a key built from
+those three. Remaining amounts are quantized to the slider step so that
+near-identical states share an entry. Entries expire after a TTL and the
+least recently used entry is evicted when the cache is full.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Remaining amounts are rounded to this step before keying (matches the UI slider step)
+QUANTIZATION_STEP = 0.5
+
+
+# Hour at which each meal slot starts
+MEAL_BOUNDARIES = [
+    (0, "breakfast"),
+    (11, "lunch"),
+    (16, "dinner"),
+    (22, "snack"),
+]
+
+
+def get_meal_time(hour: int) -> str:
+    """Map an hour of the day to the meal slot used in recommendation prompts"""
+    meal_time = MEAL_BOUNDARIES[0][1]
+    for start_hour, slot in MEAL_BOUNDARIES:
+        if hour >= start_hour:
+            meal_time = slot
+    return meal_time
+
+
+def make_cache_key(
+    remaining: Dict[str, Dict[str, Any]],
+    meal_time: str,
+    catalog_version: str,
+    step: float = QUANTIZATION_STEP,
+) -> Tuple[Hashable, ...]:
+    """
+    Build a cache key from the remaining-requirements vector
+
+    Args:
+        remaining: Category -> {"amount": remaining amount, "unit": unit}
+        meal_time: Meal slot (breakfast/lunch/dinner/snack)
+        catalog_version: Version of the food catalog the prompt draws from
+        step: Quantization step for remaining amounts
+    """
+    vector = tuple(sorted(
+        (category, round(round(float(details["amount"]) / step) * step, 3))
+        for category, details in remaining.items()
+    ))
+    return (meal_time, catalog_version, vector)
+
+
+class RecommendationCache:
+    """Thread-safe LRU cache with per-entry TTL and hit/miss counters"""
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float = 1800):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            stored_at, value = item
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Get a live value without updating LRU order or hit/miss counters"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or time.monotonic() - item[0] > self.ttl_seconds:
+                return None
+            return item[1]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def create_recommendation_cache() -> RecommendationCache:
+    """Create a cache sized from RECOMMENDATION_CACHE_SIZE / RECOMMENDATION_CACHE_TTL"""
+    return RecommendationCache(
+        max_entries=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "128")),
+        ttl_seconds=float(os.getenv("RECOMMENDATION_CACHE_TTL", "1800")),
+    )
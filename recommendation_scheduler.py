@@ -0,0 +1,143 @@
+"""
+Background pre-generation of meal recommendations.
+
+Recommendations are bucketed by meal slot, so the useful window for each one
+is known ahead of time. The scheduler warms the recommendation cache:
+
+- shortly before each meal boundary, for the slot about to start, and
+- after writes that change today's remaining requirements, debounced so a
+  burst of slider saves triggers one generation, and throttled so writes
+  can't trigger more than one generation per interval.
+
+Settings (environment):
+    RECOMMENDATION_PREGENERATE           enable the scheduler (default true)
+    RECOMMENDATION_PREGENERATE_LEAD      seconds before a meal boundary to generate (default 600)
+    RECOMMENDATION_PREGENERATE_DEBOUNCE  quiet seconds after a write before generating (default 30)
+    RECOMMENDATION_PREGENERATE_INTERVAL  minimum seconds between write-triggered runs (default 120)
+"""
+
+import asyncio
+import os
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from recommendation_cache import MEAL_BOUNDARIES, get_meal_time
+
+PREGENERATE_ENABLED = os.getenv("RECOMMENDATION_PREGENERATE", "true").lower() in ("1", "true", "yes")
+
+
+def next_meal_boundary(now: datetime, lead: timedelta) -> Tuple[datetime, str, date]:
+    """
+    Find the next pre-generation point after now
+
+    Returns:
+        (run_at, meal_time, meal_date) for the earliest boundary whose
+        run time (boundary - lead) is still in the future
+    """
+    candidates = []
+    for day_offset in (0, 1, 2):
+        day = now.date() + timedelta(days=day_offset)
+        for start_hour, meal_time in MEAL_BOUNDARIES:
+            run_at = datetime.combine(day, dtime(start_hour)) - lead
+            if run_at > now:
+                candidates.append((run_at, meal_time, day))
+    return min(candidates)
+
+
+class RecommendationScheduler:
+    """Warm the recommendation cache at meal boundaries and after writes"""
+
+    def __init__(
+        self,
+        generate: Callable[[str, date], Awaitable[Any]],
+        lead_seconds: float = 600,
+        debounce_seconds: float = 30,
+        min_interval_seconds: float = 120,
+    ):
+        """
+        Args:
+            generate: Coroutine function (meal_time, meal_date) that generates
+                and caches a recommendation
+        """
+        self._generate = generate
+        self.lead = timedelta(seconds=lead_seconds)
+        self.debounce_seconds = debounce_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self._boundary_task: Optional[asyncio.Task] = None
+        self._debounce_task: Optional[asyncio.Task] = None
+        self._last_write_run = float("-inf")
+        self.boundary_runs = 0
+        self.write_runs = 0
+        self.failures = 0
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._boundary_task is None:
+            self._boundary_task = loop.create_task(self._run_boundaries())
+
+    async def stop(self):
+        for task in (self._boundary_task, self._debounce_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._boundary_task = None
+        self._debounce_task = None
+
+    def notify_write(self, date_str: str):
+        """Schedule a debounced regeneration after a write to today's entries"""
+        if self._boundary_task is None or date_str != date.today().isoformat():
+            return
+        if self._debounce_task is not None and not self._debounce_task.done():
+            self._debounce_task.cancel()
+        self._debounce_task = asyncio.get_running_loop().create_task(self._run_after_write())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._boundary_task is not None,
+            "boundary_runs": self.boundary_runs,
+            "write_runs": self.write_runs,
+            "failures": self.failures,
+        }
+
+    async def _run_after_write(self):
+        await asyncio.sleep(self.debounce_seconds)
+        wait = self.min_interval_seconds - (time.monotonic() - self._last_write_run)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_write_run = time.monotonic()
+        now = datetime.now()
+        if await self._run(get_meal_time(now.hour), now.date()):
+            self.write_runs += 1
+
+    async def _run_boundaries(self):
+        while True:
+            now = datetime.now()
+            run_at, meal_time, meal_date = next_meal_boundary(now, self.lead)
+            await asyncio.sleep((run_at - now).total_seconds())
+            if await self._run(meal_time, meal_date):
+                self.boundary_runs += 1
+
+    async def _run(self, meal_time: str, meal_date: date) -> bool:
+        try:
+            await self._generate(meal_time, meal_date)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            print(f"Recommendation pre-generation failed for {meal_date} {meal_time}: {e}")
+            return False
+
+
+def create_recommendation_scheduler(generate: Callable[[str, date], Awaitable[Any]]) -> RecommendationScheduler:
+    """Create a scheduler configured from the environment"""
+    return RecommendationScheduler(
+        generate,
+        lead_seconds=float(os.getenv("RECOMMENDATION_PREGENERATE_LEAD", "600")),
+        debounce_seconds=float(os.getenv("RECOMMENDATION_PREGENERATE_DEBOUNCE", "30")),
+        min_interval_seconds=float(os.getenv("RECOMMENDATION_PREGENERATE_INTERVAL", "120")),
+    )
@@ -0,0 +1,149 @@
+"""
+Telemetry for recommendation requests.
+
+Every recommendation served through the LLM path is recorded: a hash of the
+prompt, latency, estimated prompt/response tokens, whether the cache answered,
+the error class if the LLM call failed, the meal slot and where the request
+came from (api, stream, pregenerate, mcp). Records go to a capped MongoDB
+collection, so storage stays bounded and the oldest records roll off.
+
+Writes happen off the request path; a telemetry failure is logged and never
+affects the recommendation itself.
+"""
+
+import asyncio
+import hashlib
+import math
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from llm_client import count_tokens
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def hash_prompt(prompt: str) -> str:
+    return hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def describe(values: Iterable[float]) -> Optional[Dict[str, float]]:
+    """Count, mean, max and percentiles of values (None when empty)"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    stats = {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "max": round(ordered[-1], 2),
+    }
+    for pct in PERCENTILES:
+        stats[f"p{pct}"] = round(percentile(ordered, pct), 2)
+    return stats
+
+
+def summarize_telemetry(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Summarize telemetry records
+
+    Returns:
+        Request/cache/error counts, latency percentiles for cache hits and
+        LLM calls, token percentiles for LLM calls, and per-meal breakdowns
+    """
+    llm_calls = [r for r in records if not r.get("cache_hit")]
+    hits = [r for r in records if r.get("cache_hit")]
+    errors: Dict[str, int] = {}
+    for record in records:
+        if record.get("error_class"):
+            errors[record["error_class"]] = errors.get(record["error_class"], 0) + 1
+    succeeded = [r for r in llm_calls if not r.get("error_class")]
+
+    by_meal: Dict[str, Dict[str, Any]] = {}
+    for meal_time in sorted({r.get("meal_time") for r in records if r.get("meal_time")}):
+        meal_records = [r for r in records if r.get("meal_time") == meal_time]
+        by_meal[meal_time] = {
+            "requests": len(meal_records),
+            "cache_hits": sum(1 for r in meal_records if r.get("cache_hit")),
+            "llm_latency_ms": describe(
+                r["latency_ms"] for r in meal_records if not r.get("cache_hit") and not r.get("error_class")
+            ),
+        }
+
+    by_source: Dict[str, int] = {}
+    for record in records:
+        source = record.get("source", "unknown")
+        by_source[source] = by_source.get(source, 0) + 1
+
+    return {
+        "requests": len(records),
+        "cache_hits": len(hits),
+        "cache_hit_rate": round(len(hits) / len(records), 4) if records else 0.0,
+        "llm_calls": len(llm_calls),
+        "llm_errors": sum(errors.values()),
+        "llm_error_rate": round(sum(errors.values()) / len(llm_calls), 4) if llm_calls else 0.0,
+        "errors_by_class": errors,
+        "cache_hit_latency_ms": describe(r["latency_ms"] for r in hits),
+        "llm_latency_ms": describe(r["latency_ms"] for r in succeeded),
+        "prompt_tokens": describe(r["prompt_tokens"] for r in llm_calls if r.get("prompt_tokens") is not None),
+        "response_tokens": describe(r["response_tokens"] for r in succeeded if r.get("response_tokens") is not None),
+        "by_meal_time": by_meal,
+        "by_source": by_source,
+    }
+
+
+class RecommendationTelemetry:
+    """Build telemetry records and write them in the background"""
+
+    def __init__(self, writer: Callable[[Dict[str, Any]], None]):
+        """
+        Args:
+            writer: Blocking function persisting one record (e.g. a MongoDB insert)
+        """
+        self._writer = writer
+        self._pending: Set[asyncio.Task] = set()
+        self.write_failures = 0
+
+    def record(
+        self,
+        source: str,
+        meal_time: str,
+        latency_ms: float,
+        cache_hit: bool,
+        prompt: Optional[str] = None,
+        response: Optional[str] = None,
+        error: Optional[BaseException] = None,
+    ) -> Dict[str, Any]:
+        """Record one recommendation request and return the record"""
+        record = {
+            "timestamp": datetime.utcnow(),
+            "source": source,
+            "meal_time": meal_time,
+            "prompt_hash": hash_prompt(prompt) if prompt else None,
+            "latency_ms": round(latency_ms, 2),
+            "cache_hit": cache_hit,
+            "prompt_tokens": count_tokens(prompt) if prompt else None,
+            "response_tokens": count_tokens(response) if response else None,
+            "error_class": type(error).__name__ if error is not None else None,
+        }
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(record)
+            return record
+        task = loop.create_task(asyncio.to_thread(self._write, record))
+        # Keep a reference until the write finishes so it isn't garbage collected
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return record
+
+    def _write(self, record: Dict[str, Any]):
+        try:
+            self._writer(record)
+        except Exception as e:
+            self.write_failures += 1
+            print(f"Failed to record recommendation telemetry: {e}")
@@ -0,0 +1,67 @@
+"""
+Single-flight request coalescing.
+
+When several clients ask for the same expensive result at once (today's
+recommendations, the same month range, a day's summary), only the first
+request runs the computation; the others await the same in-flight task and
+share its result or exception. Nothing is cached once the task finishes —
+that's the job of the caches in front of it.
+
+Keys are tuples whose first element names the kind of work (e.g.
+("range", start, end)); counters are kept per kind.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Share one in-flight computation between concurrent identical calls"""
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[Hashable, ...], asyncio.Task] = {}
+        self._stats: Dict[Hashable, Dict[str, int]] = {}
+
+    async def do(self, key: Tuple[Hashable, ...], fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn() once per key at a time
+
+        Args:
+            key: Normalized request parameters; key[0] names the kind of work
+            fn: Zero-argument coroutine function producing the result
+        """
+        stats = self._stats.setdefault(key[0], {"calls": 0, "executions": 0, "coalesced": 0})
+        stats["calls"] += 1
+
+        task = self._inflight.get(key)
+        if task is None:
+            stats["executions"] += 1
+            # A task, so one caller disconnecting doesn't cancel the work for the others
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            stats["coalesced"] += 1
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Tuple[Hashable, ...], task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Mark failures as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[Hashable, Dict[str, Any]]:
+        return {
+            kind: {
+                **counts,
+                "coalesced_rate": round(counts["coalesced"] / counts["calls"], 4) if counts["calls"] else 0.0,
+            }
+            for kind, counts in self._stats.items()
+        }
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,83 @@
+import importlib
+
+import pytest
+
+from diet_summary import build_daily_summary, build_period_completion, weighted_completion
+
+# A subset of the daily requirements, mixing units as the real ones do
+DAILY_REQUIREMENTS = {
+    "cereal": {"amount": 12.5, "unit": "exchange"},
+    "legumes": {"amount": 3, "unit": "exchange"},
+    "soy milk": {"amount": 120, "unit": "ml"},
+    "sugar": {"amount": 10, "unit": "grams"},
+}
+REQUIREMENTS = [{"category": category, **details} for category, details in DAILY_REQUIREMENTS.items()]
+TOTAL_REQUIRED = sum(details["amount"] for details in DAILY_REQUIREMENTS.values())
+
+CEREAL_ONLY_DAY = {"2026-01-05": [{"category": "cereal", "amount": 12.5}]}
+PARTIAL_DAY = {"2026-01-06": [
+    {"category": "cereal", "amount": 6.0},
+    {"category": "cereal", "amount": 2.5},
+    {"category": "soy milk", "amount": 200.0},
+    {"category": "legumes", "amount": 1.0},
+]}
+
+
+def test_missing_categories_score_zero_with_full_weight():
+    completion = weighted_completion({"cereal": 12.5}, REQUIREMENTS)
+
+    assert completion == pytest.approx(12.5 / TOTAL_REQUIRED * 100)
+
+
+def test_full_day_is_complete():
+    consumed = {category: details["amount"] * 2 for category, details in DAILY_REQUIREMENTS.items()}
+
+    assert weighted_completion(consumed, REQUIREMENTS) == 100.0
+
+
+@pytest.mark.parametrize("entries_by_date", [CEREAL_ONLY_DAY, PARTIAL_DAY])
+def test_period_completion_matches_daily_summary(entries_by_date):
+    (date_str, entries), = entries_by_date.items()
+
+    assert build_period_completion(entries_by_date, REQUIREMENTS)[date_str] == \
+        build_daily_summary(entries, REQUIREMENTS)["overall_completion"]
+
+
+@pytest.mark.parametrize("entries_by_date", [CEREAL_ONLY_DAY, PARTIAL_DAY])
+def test_history_views_match_api(entries_by_date):
+    pytest.importorskip("streamlit")
+    pytest.importorskip("pandas")
+    history = importlib.import_module("modules.history")
+    (date_str, entries), = entries_by_date.items()
+    # The Streamlit pages use their own copy of the requirements
+    requirements = history.REQUIREMENTS
+    # The range endpoint returns raw categories; history normalizes them
+    raw = {date_str: [{**entry, "category": entry["category"].title()} for entry in entries]}
+
+    api_completion = build_daily_summary(entries, requirements)["overall_completion"]
+    assert history.calculate_period_completion(raw)[date_str] == api_completion
+    assert history.calculate_completion_percentage(raw[date_str]) == api_completion
+
+
+def test_vectorized_period_matches_per_day_formula():
+    pytest.importorskip("streamlit")
+    pytest.importorskip("pandas")
+    history = importlib.import_module("modules.history")
+    payload = {
+        "2026-01-05": [{"category": "Cereal", "amount": 12.5}],
+        "2026-01-06": [
+            {"category": "cereal", "amount": 30.0},  # Over the requirement: clipped to 100%
+            {"category": "legumes", "amount": 1.0},
+            {"category": " Legumes", "amount": 0.5},
+        ],
+        "2026-01-07": [{"category": "unknown", "amount": 3.0}],  # No requirement: 0%
+        "2026-01-08": [],
+    }
+
+    expected = build_period_completion(
+        {date_str: history.normalize_entries(entries) for date_str, entries in payload.items() if entries},
+        history.REQUIREMENTS
+    )
+    assert history.calculate_period_completion(payload) == expected
+    for date_str, entries in payload.items():
+        assert history.calculate_completion_percentage(entries) == expected.get(date_str, 0.0)
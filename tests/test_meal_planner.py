@@ -0,0 +1,33 @@
+from datetime import date
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from meal_planner import MealPlanner  # noqa: E402
+
+
+@pytest.fixture
+def planner():
+    catalog = pd.DataFrame({
+        "food_item": ["Rice", "Wheat roti", "Poha"],
+        "portion_size": ["30 g", "1 piece", "20 g"],
+    })
+    return MealPlanner({"cereal": catalog})
+
+
+@pytest.mark.parametrize("amount", [0.3, 0.8, 1.3, 2.7])
+def test_plan_never_exceeds_remaining(planner, amount):
+    plan = planner.plan({"cereal": {"amount": amount, "unit": "exchange"}}, "dinner", date(2026, 1, 1))
+
+    planned = sum(item["amount"] for item in plan["items"])
+    assert planned == pytest.approx(amount)
+    assert "cereal" not in plan["rest_of_day"]
+
+
+def test_plan_splits_share_of_remaining(planner):
+    plan = planner.plan({"cereal": {"amount": 2.3, "unit": "exchange"}}, "breakfast", date(2026, 1, 1))
+
+    planned = sum(item["amount"] for item in plan["items"])
+    assert planned <= 2.3
+    assert plan["rest_of_day"]["cereal"]["amount"] == pytest.approx(round(2.3 - planned, 2))
@@ -0,0 +1,167 @@
+import importlib.util
+import os
+
+import pytest
+
+# Loaded by path: importing the modules package pulls in Streamlit
+_spec = importlib.util.spec_from_file_location(
+    "write_queue", os.path.join(os.path.dirname(__file__), "..", "modules", "write_queue.py")
+)
+write_queue = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(write_queue)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class FakeAPI:
+    """Records sends and answers with scripted statuses (200 once the script runs out)"""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.sent = []
+        self.on_send = None
+
+    def __call__(self, day, entries):
+        self.sent.append((day, {entry["category"]: entry["amount"] for entry in entries}))
+        if self.on_send:
+            self.on_send(day)
+        status = self.statuses.pop(0) if self.statuses else 200
+        if isinstance(status, Exception):
+            raise status
+        return status
+
+
+def entry(category, amount):
+    return {"category": category, "food_item": category, "amount": amount, "unit": "exchange"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(write_queue, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def make_queue(tmp_path, clock):
+    def make(api, **kwargs):
+        sent_days = []
+        queue = write_queue.WriteQueue(
+            str(tmp_path / "queue.sqlite3"), api, on_sent=sent_days.append, **kwargs
+        )
+        queue.sent_days = sent_days
+        return queue
+    return make
+
+
+def test_saves_for_a_day_are_merged(make_queue):
+    api = FakeAPI()
+    queue = make_queue(api)
+
+    queue.enqueue("2026-01-05", [entry("cereal", 1.0), entry("legumes", 1.0)])
+    queue.enqueue("2026-01-05", [entry("cereal", 2.5)])
+
+    assert queue.pending("2026-01-05") == {"cereal": 2.5, "legumes": 1.0}
+    assert queue.flush() == 1
+    assert api.sent == [("2026-01-05", {"cereal": 2.5, "legumes": 1.0})]
+    assert queue.pending("2026-01-05") == {}
+    assert queue.sent_days == ["2026-01-05"]
+
+
+def test_queue_survives_reopening(make_queue):
+    make_queue(FakeAPI()).enqueue("2026-01-05", [entry("cereal", 1.0)])
+
+    assert make_queue(FakeAPI()).pending("2026-01-05") == {"cereal": 1.0}
+
+
+def test_save_merged_during_send_is_sent_again(make_queue):
+    api = FakeAPI()
+    queue = make_queue(api)
+    queue.enqueue("2026-01-05", [entry("cereal", 1.0)])
+
+    def merge_once(day):
+        api.on_send = None
+        queue.enqueue(day, [entry("cereal", 3.0)])
+    api.on_send = merge_once
+
+    assert queue.flush() == 1
+    # The first send carried the old value, so the newer one stays queued
+    assert queue.pending("2026-01-05") == {"cereal": 3.0}
+    assert queue.flush() == 1
+    assert api.sent[-1] == ("2026-01-05", {"cereal": 3.0})
+    assert queue.pending("2026-01-05") == {}
+
+
+def test_transient_failure_backs_off_and_stops_the_pass(make_queue, clock):
+    api = FakeAPI([503, ConnectionError("down"), 502])
+    queue = make_queue(api, base_backoff=2.0, max_backoff=5.0)
+    queue.enqueue("2026-01-05", [entry("cereal", 1.0)])
+    queue.enqueue("2026-01-06", [entry("cereal", 2.0)])
+
+    assert queue.flush() == 0
+    # The later day isn't attempted while the API looks down
+    assert [day for day, _ in api.sent] == ["2026-01-05"]
+    assert queue.stats()["retrying_days"] == 1
+    assert queue.stats()["last_error"] == "HTTP 503"
+
+    # Not due yet: the second day goes first, and fails too
+    assert queue.flush() == 0
+    assert [day for day, _ in api.sent] == ["2026-01-05", "2026-01-06"]
+
+    clock.now += 2.0
+    assert queue.flush() == 0  # Both due; 2026-01-05 fails with 502 and ends the pass
+    assert len(api.sent) == 3
+
+    clock.now += 2.0
+    assert queue.flush() == 1  # 2026-01-06 was skipped by the failed pass; sent now
+    clock.now += 1.9
+    assert queue.flush() == 0  # 2026-01-05's second backoff is 4s
+    clock.now += 0.1
+    assert queue.flush() == 1
+    assert queue.stats()["pending_days"] == 0
+
+
+def test_backoff_is_capped(make_queue, clock):
+    queue = make_queue(FakeAPI([503] * 10), base_backoff=2.0, max_backoff=5.0)
+    queue.enqueue("2026-01-05", [entry("cereal", 1.0)])
+
+    for _ in range(4):
+        queue.flush()
+        clock.now += 5.0
+    assert queue.flush() == 0
+    assert queue.stats()["retrying_days"] == 1
+    assert queue.failures == 5
+
+
+def test_rejected_save_is_set_aside_without_blocking_later_days(make_queue):
+    api = FakeAPI([422])
+    queue = make_queue(api)
+    queue.enqueue("2026-01-05", [entry("cereal", -1.0)])
+    queue.enqueue("2026-01-06", [entry("cereal", 2.0)])
+
+    assert queue.flush() == 1
+    assert [day for day, _ in api.sent] == ["2026-01-05", "2026-01-06"]
+    stats = queue.stats()
+    assert stats["pending_days"] == 0
+    assert stats["rejected_saves"] == 1
+    assert stats["rejected_days"] == ["2026-01-05"]
+    assert queue.rejected()[0]["status"] == 422
+
+    queue.clear_rejected()
+    assert queue.stats()["rejected_saves"] == 0
+
+
+@pytest.mark.parametrize("status", [408, 429, 500])
+def test_retryable_statuses_are_not_rejected(make_queue, status):
+    queue = make_queue(FakeAPI([status]))
+    queue.enqueue("2026-01-05", [entry("cereal", 1.0)])
+
+    assert queue.flush() == 0
+    assert queue.stats()["rejected_saves"] == 0
+    assert queue.stats()["retrying_days"] == 1